@@ -9,7 +9,8 @@ import json
 import logging
 import os
 import sys
-from datetime import datetime
+import time
+from datetime import datetime, date, timedelta
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
@@ -17,8 +18,25 @@ from aiohttp import web, WSMsgType
 from aiohttp.web_ws import WebSocketResponse
 import aiofiles
 
+from history import LogHistory, parse_query_time
 from log_reader import LogReader
-from smb_detector import SMBPathDetector
+from log_records import RecordFilter
+from log_search import LogSearch, SearchQuery, MAX_SEARCH_RESULTS
+from metrics import (
+    BROADCAST_SECONDS, LINES_DELIVERED, REGISTRY, RESPONSE_CACHE_HITS, SERIALIZE_SECONDS,
+    WEBSOCKET_CLIENTS, WEBSOCKET_QUEUED
+)
+from path_health import PathHealthMonitor
+from share_io import all_share_executors, shutdown_share_executors
+from subscriptions import Subscription
+from transport import (
+    BATCH_CONTENT_TYPE, STREAM_MIN_LINES, WS_COMPRESS, ResponseCache, compress_body,
+    dumps, dumps_str, encode_batch, encode_batch_slices, encoded_response, iter_batch,
+    iter_batch_slices, iter_json, json_response, negotiate_encoding, serializer_name,
+    stream_response, wants_batch
+)
+from tail_engine import TailEngine
+from ws_client import WebSocketClient
 
 # Configure logging
 logging.basicConfig(
@@ -31,11 +49,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backoff between failed reader initializations (seconds)
+INIT_RETRY_INITIAL = 2.0
+INIT_RETRY_MAX = 60.0
+
 class LogMonitorApp:
     def __init__(self):
         self.app = web.Application()
         self.log_reader = None
-        self.websockets = set()
+        self.tail_engine = None
+        self.log_history = None
+        self.log_search = None
+        self.path_health = PathHealthMonitor()
+        self._path_switch: Optional[asyncio.Task] = None
+        self._mirror_task: Optional[asyncio.Task] = None
+        self._text_index_task: Optional[asyncio.Task] = None
+        # One shared initialization attempt at a time, retried with backoff
+        self._init_task: Optional[asyncio.Task] = None
+        self._init_failures = 0
+        self._init_retry_at = 0.0
+        self._init_error: Optional[str] = None
+        self.websockets: Dict[WebSocketResponse, WebSocketClient] = {}
+        self.response_cache = ResponseCache()
+        WEBSOCKET_CLIENTS.callback = lambda: len(self.websockets)
+        WEBSOCKET_QUEUED.callback = lambda: sum(c.queue_depth for c in self.websockets.values())
         self.setup_routes()
         
     def setup_routes(self):
@@ -43,6 +80,11 @@ class LogMonitorApp:
         self.app.router.add_get('/', self.serve_index)
         self.app.router.add_get('/api/logs', self.get_logs)
         self.app.router.add_get('/api/status', self.get_status)
+        self.app.router.add_get('/metrics', self.get_metrics)
+        self.app.router.add_get('/api/history', self.get_history)
+        self.app.router.add_get('/api/search', self.search_logs)
+        self.app.router.add_get('/api/stats', self.get_stats)
+        self.app.router.add_delete('/api/search/{search_id}', self.cancel_search)
         self.app.router.add_get('/ws', self.websocket_handler)
         self.app.router.add_static('/static/', path='static/', name='static')
         
@@ -58,59 +100,276 @@ class LogMonitorApp:
     async def get_logs(self, request):
         """API endpoint to get log data"""
         try:
-            last_size = int(request.query.get('lastSize', 0))
+            since = request.query.get('since')
+            since = int(since) if since not in (None, '') else None
             max_lines = int(request.query.get('maxLines', 1000))
+            try:
+                record_filter = self.parse_record_filter(request.query)
+            except ValueError as e:
+                return json_response({
+                    'success': False,
+                    'error': str(e)
+                }, status=400)
             
-            if not self.log_reader:
-                await self.initialize_log_reader()
+            if not self.tail_engine:
+                return self.initializing_response()
             
-            if not self.log_reader:
-                return web.json_response({
-                    'success': False,
-                    'error': 'Unable to initialize log reader'
-                }, status=500)
+            # Served from the shared buffer; only the engine touches the share
+            stream_id = request.query.get('stream') or None
+            batch = wants_batch(request)
+            coding = negotiate_encoding(request)
+            version = self.tail_engine.state_version
+            cache_key = (
+                since, max_lines, record_filter.key if record_filter else None,
+                stream_id in (None, self.tail_engine.stream_id), batch, coding
+            )
+            cached = self.response_cache.get(version, cache_key)
+            if cached:
+                RESPONSE_CACHE_HITS.inc()
+                return encoded_response(*cached)
             
-            result = await self.log_reader.read_logs(last_size, max_lines)
-            return web.json_response(result)
+            result = await self.tail_engine.get_logs(since, max_lines, record_filter, stream_id)
+            content_type = BATCH_CONTENT_TYPE if batch else 'application/json'
+            lines = result.get('newLines') or []
+            LINES_DELIVERED.labels('http').inc(len(lines))
+            slices = None
+            if batch and result.get('success'):
+                result.pop('newLines')
+                if (record_filter is None or record_filter.empty) and not result.get('replayed'):
+                    # Copy the packed lines straight out of the buffer
+                    slices = list(self.tail_engine.buffer.slices(result['startSeq'], result['nextSeq']))
+            
+            if len(lines) > STREAM_MIN_LINES:
+                # Large pages go out chunk by chunk instead of as one buffer
+                if not batch or not result.get('success'):
+                    chunks = iter_json(result)
+                elif slices is not None:
+                    chunks = iter_batch_slices(result, slices)
+                else:
+                    chunks = iter_batch(result, lines)
+                return await stream_response(request, chunks, content_type)
+            
+            with SERIALIZE_SECONDS.time():
+                if not batch or not result.get('success'):
+                    body = dumps(result)
+                elif slices is not None:
+                    body = encode_batch_slices(result, slices)
+                else:
+                    body = encode_batch(result, lines)
+                body, coding = compress_body(body, coding)
+            # A gap may come from a replay that failed only this time; let the next poll retry it
+            if not (result.get('gap') or result.get('reset')):
+                self.response_cache.put(version, cache_key, body, content_type, coding)
+            return encoded_response(body, content_type, coding)
             
         except Exception as e:
             logger.error(f"Error in get_logs: {e}")
-            return web.json_response({
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+    
+    @staticmethod
+    def parse_record_filter(query) -> Optional[RecordFilter]:
+        """Build a RecordFilter from level/component/from/to query parameters"""
+        level = query.get('level') or None
+        components = [c.strip() for c in query.get('component', '').split(',') if c.strip()]
+        since_ms = until_ms = None
+        if query.get('from'):
+            since_ms = int(parse_query_time(query['from']).timestamp() * 1000)
+        if query.get('to'):
+            until_ms = int(parse_query_time(query['to']).timestamp() * 1000)
+        if not (level or components or since_ms is not None or until_ms is not None):
+            return None
+        return RecordFilter(level, components or None, since_ms, until_ms)
+    
+    async def get_history(self, request):
+        """API endpoint to page through past log lines by time range"""
+        try:
+            start = parse_query_time(request.query.get('from'))
+            end = parse_query_time(request.query.get('to'), default=datetime.now())
+            cursor = request.query.get('cursor') or None
+            limit = int(request.query.get('limit', 500))
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        try:
+            if not self.log_history:
+                return self.initializing_response()
+            
+            result = await self.log_history.query(start, end, cursor, limit)
+            return json_response(result)
+            
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        except asyncio.TimeoutError:
+            logger.error("Timeout in get_history")
+            return json_response({
+                'success': False,
+                'error': 'Timeout reading history'
+            }, status=504)
+        except Exception as e:
+            logger.error(f"Error in get_history: {e}")
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=500)
     
+    async def get_stats(self, request):
+        """API endpoint returning per-level and per-component counts over time"""
+        try:
+            end = parse_query_time(request.query.get('to'), default=datetime.now())
+            start = parse_query_time(request.query.get('from'), default=end - timedelta(hours=1))
+            step = int(request.query.get('step', 60))
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        try:
+            if not self.tail_engine:
+                return self.initializing_response()
+            
+            result = await self.tail_engine.rollups.query(start, end, step)
+            return json_response(result)
+            
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        except asyncio.TimeoutError:
+            logger.error("Timeout in get_stats")
+            return json_response({
+                'success': False,
+                'error': 'Timeout reading log files'
+            }, status=504)
+        except Exception as e:
+            logger.error(f"Error in get_stats: {e}")
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+    
+    async def search_logs(self, request):
+        """API endpoint streaming search matches as newline-delimited JSON"""
+        try:
+            query = SearchQuery(
+                request.query.get('q', ''),
+                mode=request.query.get('mode', 'text'),
+                ignore_case=request.query.get('ignoreCase', 'true').lower() != 'false',
+                context=int(request.query.get('context', 0))
+            )
+            # Every pool range may buffer up to limit matches before they are merged
+            limit = min(max(int(request.query.get('limit', 1000)), 1), MAX_SEARCH_RESULTS)
+            names = [n for n in request.query.get('files', '').split(',') if n]
+            first = request.query.get('from')
+            last = request.query.get('to')
+            first = date.fromisoformat(first) if first else None
+            last = date.fromisoformat(last) if last else None
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        if not self.log_search:
+            return self.initializing_response()
+        
+        try:
+            files = await self.log_search.resolve_files(names, first, last)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        
+        # Closing the generator on any exit cancels the worker
+        messages = self.log_search.search(query, files, limit, request.query.get('id'))
+        try:
+            async for message in messages:
+                await response.write(dumps(message) + b'\n')
+            await response.write_eof()
+        except ConnectionResetError:
+            logger.info("Search client disconnected, search cancelled")
+        except Exception as e:
+            logger.error(f"Error in search_logs: {e}")
+            await response.write(dumps({'type': 'error', 'error': str(e)}) + b'\n')
+            await response.write_eof()
+        finally:
+            await messages.aclose()
+        
+        return response
+    
+    async def cancel_search(self, request):
+        """API endpoint to cancel a running search by its searchId"""
+        search_id = request.match_info['search_id']
+        cancelled = bool(self.log_search) and self.log_search.cancel(search_id)
+        return json_response({
+            'success': cancelled,
+            'searchId': search_id
+        }, status=200 if cancelled else 404)
+    
     async def get_status(self, request):
         """API endpoint to get system status"""
         try:
-            detector = SMBPathDetector()
-            paths_status = await detector.test_all_paths()
-            
+            # Served from the background probe cache, never from the share
             status = {
                 'timestamp': datetime.now().isoformat(),
                 'log_reader_initialized': self.log_reader is not None,
-                'smb_paths': paths_status,
-                'active_connections': len(self.websockets)
+                'initialization': self.init_state(),
+                'smb_paths': self.path_health.snapshot(),
+                'smb_paths_checked_at': self.path_health.last_refresh.isoformat() if self.path_health.last_refresh else None,
+                'active_connections': len(self.websockets),
+                'websocket_clients': [c.stats() for c in self.websockets.values()],
+                'share_io': [e.stats() for e in all_share_executors().values()],
+                'serializer': serializer_name(),
+                'response_cache': self.response_cache.stats()
             }
             
             if self.log_reader:
                 status['current_log_file'] = str(self.log_reader.current_log_file) if self.log_reader.current_log_file else None
                 status['current_smb_path'] = str(self.log_reader.smb_path) if self.log_reader.smb_path else None
+                status['log_catalog'] = self.log_reader.catalog.stats()
+                status['mirror'] = self.log_reader.mirror.stats()
+                status['text_index'] = self.log_search.text_index.stats()
+            if self.tail_engine:
+                status['rollups'] = self.tail_engine.rollups.stats()
             
-            return web.json_response(status)
+            return json_response(status)
             
         except Exception as e:
             logger.error(f"Error in get_status: {e}")
-            return web.json_response({
+            return json_response({
                 'error': str(e)
             }, status=500)
     
+    async def get_metrics(self, request):
+        """Prometheus text exposition of the hot-path metrics"""
+        return web.Response(
+            body=REGISTRY.render().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+    
     async def websocket_handler(self, request):
         """WebSocket handler for real-time updates"""
-        ws = web.WebSocketResponse()
+        ws = web.WebSocketResponse(compress=WS_COMPRESS)
         await ws.prepare(request)
         
-        self.websockets.add(ws)
+        client = WebSocketClient(ws, request.remote)
+        client.binary = request.query.get('format') == 'batch'
+        client.start()
+        self.websockets[ws] = client
         logger.info(f"WebSocket connected. Total connections: {len(self.websockets)}")
         
         try:
@@ -119,8 +378,13 @@ class LogMonitorApp:
                     try:
                         data = json.loads(msg.data)
                         if data.get('type') == 'ping':
-                            await ws.send_str(json.dumps({'type': 'pong'}))
-                    except json.JSONDecodeError:
+                            client.enqueue(dumps_str({'type': 'pong'}))
+                        elif data.get('type') == 'subscribe':
+                            self.subscribe(client, data)
+                        elif data.get('type') == 'unsubscribe':
+                            client.subscription = None
+                            client.enqueue(dumps_str({'type': 'subscribed', 'filter': None}))
+                    except (json.JSONDecodeError, AttributeError):
                         pass
                 elif msg.type == WSMsgType.ERROR:
                     logger.error(f'WebSocket error: {ws.exception()}')
@@ -128,80 +392,262 @@ class LogMonitorApp:
         except Exception as e:
             logger.error(f"WebSocket error: {e}")
         finally:
-            self.websockets.discard(ws)
+            self.websockets.pop(ws, None)
+            await client.close()
             logger.info(f"WebSocket disconnected. Total connections: {len(self.websockets)}")
         
         return ws
     
+    def subscribe(self, client: WebSocketClient, data: Dict[str, Any]):
+        """Install a client's server-side filter, sharing equal filters between clients"""
+        try:
+            subscription = Subscription.from_message(data)
+        except ValueError as e:
+            client.enqueue(dumps_str({'type': 'error', 'error': str(e)}))
+            return
+        
+        if subscription:
+            for other in self.websockets.values():
+                if other.subscription and other.subscription.key == subscription.key:
+                    subscription = other.subscription
+                    break
+        client.subscription = subscription
+        client.enqueue(dumps_str({
+            'type': 'subscribed',
+            'filter': subscription.to_dict() if subscription else None
+        }))
+    
     async def broadcast_update(self, data: Dict[Any, Any]):
         """Broadcast update to all connected WebSocket clients"""
         if not self.websockets:
             return
-            
-        message = json.dumps(data)
-        disconnected = set()
         
-        for ws in self.websockets:
-            try:
-                await ws.send_str(message)
-            except Exception as e:
-                logger.warning(f"Failed to send to WebSocket: {e}")
-                disconnected.add(ws)
+        # Serialised once; each client's sender task delivers at its own pace
+        message = dumps_str(data)
+        disconnected = [
+            client for client in self.websockets.values()
+            if not client.enqueue(message)
+        ]
+        await self.drop_clients(disconnected)
+    
+    async def broadcast_log_update(self, update: Dict[str, Any]):
+        """Send a batch to every client, filtered server-side per subscription
+        
+        Clients are grouped by subscription key, so each distinct filter is
+        evaluated and serialised once per batch. Filtered clients get only
+        the matching lines, and nothing when no line matches.
+        """
+        if not self.websockets:
+            return
+        
+        with BROADCAST_SECONDS.time():
+            disconnected = self._fan_out(update)
+        await self.drop_clients(disconnected)
+    
+    def _fan_out(self, update: Dict[str, Any]) -> List[WebSocketClient]:
+        """Enqueue update for every client; returns the clients that overflowed"""
+        groups: Dict[Any, List[WebSocketClient]] = {}
+        subscriptions: Dict[Any, Subscription] = {}
+        for client in self.websockets.values():
+            key = client.subscription.key if client.subscription else None
+            groups.setdefault(key, []).append(client)
+            if client.subscription:
+                subscriptions.setdefault(key, client.subscription)
         
-        # Remove disconnected websockets
-        self.websockets -= disconnected
+        slices = list(self.tail_engine.buffer.slices(update['startSeq'], update['nextSeq']))
+        disconnected = []
+        for key, clients in groups.items():
+            if key is None:
+                payload = update
+            else:
+                subscription = subscriptions[key]
+                lines = []
+                for batch, first, last in slices:
+                    lines.extend(subscription.select(batch, first, last))
+                if not lines:
+                    continue
+                payload = {
+                    **update,
+                    'newLines': lines,
+                    'totalLines': len(lines),
+                    'filter': subscription.to_dict()
+                }
+            
+            # Each encoding is built at most once per group
+            messages = {}
+            for client in clients:
+                if client.binary not in messages:
+                    messages[client.binary] = self.encode_log_update(payload, slices if key is None else None, client.binary)
+                if not client.enqueue(messages[client.binary]):
+                    disconnected.append(client)
+            LINES_DELIVERED.labels('websocket').inc(len(payload['newLines']) * len(clients))
+        return disconnected
+    
+    @staticmethod
+    def encode_log_update(payload: Dict[str, Any], slices, binary: bool):
+        """Text JSON frame, or a binary batch frame for format=batch clients"""
+        if not binary:
+            return dumps_str({'type': 'log_update', 'data': payload})
+        meta = {k: v for k, v in payload.items() if k != 'newLines'}
+        meta['type'] = 'log_update'
+        if slices is not None:
+            return encode_batch_slices(meta, slices)
+        return encode_batch(meta, payload['newLines'])
+    
+    async def drop_clients(self, clients: List[WebSocketClient]):
+        """Close clients that overflowed under the disconnect policy"""
+        for client in clients:
+            self.websockets.pop(client.ws, None)
+            await client.close()
+    
+    def start_initialization(self) -> Optional[asyncio.Task]:
+        """Start the shared initialization attempt unless one is running or backing off
+        
+        Returns the current attempt, which may be a finished, failed one
+        while the retry backoff has not elapsed yet.
+        """
+        if self.tail_engine:
+            return None
+        running = self._init_task is not None and not self._init_task.done()
+        if not running and time.monotonic() >= self._init_retry_at:
+            self._init_task = asyncio.create_task(self._initialize())
+        return self._init_task
     
-    async def initialize_log_reader(self):
-        """Initialize the log reader with SMB path detection"""
+    async def initialize_log_reader(self) -> bool:
+        """Wait for the shared initialization attempt; True once the reader is ready"""
+        task = self.start_initialization()
+        if task is not None:
+            await asyncio.shield(task)
+        return self.tail_engine is not None
+    
+    async def _initialize(self):
+        """Pick a path, build the reader and load the initial window"""
         try:
-            detector = SMBPathDetector()
-            smb_path = await detector.find_accessible_path()
+            smb_path = await self.path_health.best_path()
+            if not smb_path:
+                raise OSError("No accessible SMB path found")
+            
+            log_reader = LogReader(smb_path)
+            self.path_health.set_active(smb_path)
+            tail_engine = TailEngine(log_reader)
+            tail_engine.add_listener(self.on_log_update)
+            tail_engine.add_result_listener(self.on_read_result)
+            await tail_engine.ensure_primed()
             
-            if smb_path:
-                self.log_reader = LogReader(smb_path)
-                logger.info(f"Log reader initialized with path: {smb_path}")
-                return True
+            # Published together so handlers never see a half-built reader
+            self.log_reader = log_reader
+            self.log_history = LogHistory(log_reader)
+            self.log_search = LogSearch(log_reader)
+            self.tail_engine = tail_engine
+            self._mirror_task = asyncio.create_task(log_reader.mirror.run_backfill(log_reader))
+            self._text_index_task = asyncio.create_task(self.log_search.text_index.run(log_reader))
+            self._init_failures = 0
+            self._init_error = None
+            logger.info(f"Log reader initialized with path: {smb_path}")
+        except Exception as e:
+            self._init_failures += 1
+            self._init_error = str(e)
+            delay = min(INIT_RETRY_INITIAL * 2 ** (self._init_failures - 1), INIT_RETRY_MAX)
+            self._init_retry_at = time.monotonic() + delay
+            logger.error(f"Failed to initialize log reader: {e}, retrying in {delay:.0f}s")
+    
+    def init_state(self) -> Dict[str, Any]:
+        """Where reader initialization stands, for responses and /api/status"""
+        if self.tail_engine:
+            return {'state': 'ready'}
+        if self._init_task is not None and not self._init_task.done():
+            state = 'initializing'
+        elif self._init_failures:
+            state = 'failed'
+        else:
+            state = 'pending'
+        return {
+            'state': state,
+            'attempts': self._init_failures,
+            'lastError': self._init_error,
+            'retryIn': round(max(self._init_retry_at - time.monotonic(), 0.0), 1)
+        }
+    
+    def initializing_response(self) -> web.Response:
+        """503 telling the client to retry, after kicking off initialization"""
+        self.start_initialization()
+        state = self.init_state()
+        retry_after = max(1, int(state.get('retryIn') or 0))
+        response = json_response({
+            'success': False,
+            'initializing': True,
+            'error': 'Log reader is initializing' if state['state'] != 'failed'
+                else f"Log reader unavailable: {state['lastError']}",
+            'initialization': state,
+            'retryAfter': retry_after,
+            'timestamp': datetime.now().isoformat()
+        }, status=503)
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    
+    async def on_log_update(self, update: Dict[str, Any]):
+        """Forward a new batch from the tail engine to WebSocket clients"""
+        await self.broadcast_log_update(update)
+    
+    def on_read_result(self, result: Dict[str, Any], elapsed: float):
+        """Track read health of the active path and switch paths when needed"""
+        health = self.path_health
+        ok = bool(result.get('success'))
+        health.record_read(health.active_path, ok, elapsed)
+        if not ok:
+            health.report_failure(health.active_path)
+        
+        if health.needs_failover() or health.failback_due():
+            if not self._path_switch or self._path_switch.done():
+                self._path_switch = asyncio.create_task(self.reselect_path())
+    
+    async def reselect_path(self):
+        """Fail over to a healthy path, or back to the preferred one"""
+        health = self.path_health
+        try:
+            if health.failback_due():
+                target = health.preferred_path
             else:
-                logger.error("No accessible SMB path found")
-                return False
-                
+                target = await health.failover_target()
+            
+            current = health.active_path
+            if not target or target == current:
+                logger.warning(f"No healthy alternative to {current}")
+                return
+            
+            await self.tail_engine.switch_path(target)
+            health.set_active(target)
+            logger.warning(f"Switched log source from {current} to {target}")
         except Exception as e:
-            logger.error(f"Failed to initialize log reader: {e}")
-            return False
+            logger.error(f"Path switch failed: {e}")
     
     async def start_log_monitoring(self):
         """Start background log monitoring task"""
-        if not self.log_reader:
-            await self.initialize_log_reader()
-        
-        if not self.log_reader:
-            logger.error("Cannot start monitoring: log reader not initialized")
-            return
+        while not await self.initialize_log_reader():
+            # Wait out the backoff instead of re-probing immediately
+            await asyncio.sleep(max(self._init_retry_at - time.monotonic(), 0.1))
         
         logger.info("Starting log monitoring task")
-        
-        while True:
-            try:
-                # Check for new log data
-                result = await self.log_reader.check_for_updates()
-                
-                if result.get('hasNewData'):
-                    # Broadcast to WebSocket clients
-                    await self.broadcast_update({
-                        'type': 'log_update',
-                        'data': result
-                    })
-                
-                # Wait before next check
-                await asyncio.sleep(2)  # Check every 2 seconds
-                
-            except Exception as e:
-                logger.error(f"Error in log monitoring: {e}")
-                await asyncio.sleep(5)  # Wait longer on error
+        await self.tail_engine.run()
+    
+    async def cleanup(self, app):
+        """Release background resources on shutdown"""
+        if self._init_task and not self._init_task.done():
+            self._init_task.cancel()
+        for task in (self._mirror_task, self._text_index_task):
+            if task:
+                task.cancel()
+        await self.path_health.stop()
+        if self.log_search:
+            self.log_search.shutdown()
+        shutdown_share_executors()
     
     async def create_app(self):
         """Create and configure the application"""
-        # Start background monitoring task
+        self.app.on_cleanup.append(self.cleanup)
+        self.path_health.start()
+        # Start background monitoring task; initialization runs inside it, so
+        # the server accepts requests right away
         asyncio.create_task(self.start_log_monitoring())
         return self.app
 
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks - Python Version
+Measure hot paths of the log reader against synthetic ACTSentinel logs
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import List
+
+from log_reader import LogReader
+from log_records import RecordBatch
+from transport import (
+    HAS_BROTLI, HAS_ORJSON, BROTLI_QUALITY, JsonSerializer, OrjsonSerializer, ResponseCache,
+    brotli, compress_body, dumps, encode_batch, encode_batch_slices, iter_json
+)
+
+def write_synthetic_log(path: Path, size_mb: int, seed: int = 42) -> int:
+    """Write a synthetic log mixing short lines, blank lines and stack traces"""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    trace = ''.join(f"    at com.act.sentinel.Module{i}.handle(Module{i}.java:{i * 7})\r\n" for i in range(40))
+
+    with open(path, 'wb', buffering=4 * 1024 * 1024) as f:
+        second = 0
+        while written < target:
+            block = []
+            for _ in range(1000):
+                second += 1
+                stamp = f"2025-08-05 {second // 3600 % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d}.000"
+                kind = rng.random()
+                if kind < 0.05:
+                    block.append(f"{stamp} ERROR [Dispatcher] Unhandled exception\r\n{trace}")
+                elif kind < 0.15:
+                    block.append("\r\n\r\n")
+                else:
+                    block.append(f"{stamp} INFO [Worker{rng.randint(1, 16)}] Processed request id={rng.getrandbits(48):x}\r\n")
+            data = ''.join(block).encode('utf-8')
+            f.write(data)
+            written += len(data)
+
+    return written
+
+def bytes_for_last_lines(path: Path, max_lines: int) -> int:
+    """Count the bytes a reverse tail must scan to collect max_lines lines"""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        pos = size
+        carry = b''
+        found = 0
+        consumed = size
+        while pos > 0:
+            read_size = min(1024 * 1024, pos)
+            pos -= read_size
+            f.seek(pos)
+            parts = (f.read(read_size) + carry).split(b'\n')
+            carry = parts[0]
+            for line in reversed(parts[1:]):
+                consumed -= len(line) + 1
+                if line.strip():
+                    found += 1
+                    if found >= max_lines:
+                        return size - consumed
+        return size
+
+async def bench_read_last_lines(path: Path, repeats: int):
+    """Time read_last_lines for growing max_lines and report throughput"""
+    reader = LogReader(str(path.parent))
+
+    print("read_last_lines (reverse tail)")
+    print(f"{'maxLines':>10} {'lines':>8} {'MB scanned':>11} {'best ms':>9} {'MB/s':>9}")
+
+    for max_lines in (100, 1000, 10000, 100000, 1000000):
+        best = float('inf')
+        lines = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            lines = await reader.read_last_lines(path, max_lines, timeout=600.0)
+            best = min(best, time.perf_counter() - start)
+
+        scanned_mb = bytes_for_last_lines(path, max_lines) / (1024 * 1024)
+        throughput = scanned_mb / best if best > 0 else 0
+        print(f"{max_lines:>10} {len(lines):>8} {scanned_mb:>11.1f} {best * 1000:>9.1f} {throughput:>9.1f}")
+
+    print("MB/s settles to a constant once the fixed open/first-block cost is amortised,")
+    print("i.e. cost grows linearly with bytes scanned.")
+    print()
+
+def synthetic_lines(count: int, seed: int = 7) -> List[str]:
+    """Typical tail lines: mostly INFO requests with some ERROR lines"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        stamp = f"2025-08-05 14:{i // 60 % 60:02d}:{i % 60:02d}.{rng.randint(0, 999):03d}"
+        if rng.random() < 0.05:
+            lines.append(f"{stamp} ERROR [Dispatcher] Unhandled exception in job {rng.getrandbits(32):x}: timeout after 30000 ms")
+        else:
+            lines.append(f"{stamp} INFO [Worker{rng.randint(1, 16)}] Processed request id={rng.getrandbits(48):x} in {rng.randint(1, 900)} ms")
+    return lines
+
+def _best_time(func, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _ws_deflate(data: bytes) -> bytes:
+    """What permessage-deflate puts on the wire for one message"""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)[:-4]
+
+def bench_transport(repeats: int):
+    """Bytes on the wire and encode CPU per batch for each transport encoding"""
+    print("log batch transport encodings")
+    print(f"{'lines':>6} {'encoding':<16} {'bytes':>9} {'vs json':>8} {'encode ms':>10}")
+
+    for count in (100, 1000, 5000):
+        lines = synthetic_lines(count)
+        batch = RecordBatch(lines)
+        meta = {'success': True, 'filename': 'ACTSentinel20250805.log', 'startSeq': 0, 'nextSeq': count}
+        payload = {**meta, 'newLines': lines}
+
+        as_json = lambda: json.dumps(payload).encode('utf-8')
+        as_batch = lambda: encode_batch(meta, lines)
+        from_buffer = lambda: encode_batch_slices(meta, [(batch, 0, count)])
+        encodings = [
+            ('json', as_json),
+            ('json+gzip', lambda: gzip.compress(as_json(), 6)),
+            ('json+ws-deflate', lambda: _ws_deflate(as_json())),
+            ('batch', as_batch),
+            ('batch(buffer)', from_buffer),
+            ('batch+gzip', lambda: gzip.compress(from_buffer(), 6)),
+            ('batch+ws-deflate', lambda: _ws_deflate(from_buffer())),
+        ]
+        if HAS_BROTLI:
+            encodings.insert(2, ('json+br', lambda: brotli.compress(as_json(), quality=BROTLI_QUALITY)))
+            encodings.append(('batch+br', lambda: brotli.compress(from_buffer(), quality=BROTLI_QUALITY)))
+
+        json_size = len(as_json())
+        for name, encode in encodings:
+            size = len(encode())
+            elapsed = _best_time(encode, repeats)
+            print(f"{count:>6} {name:<16} {size:>9} {size / json_size:>7.0%} {elapsed * 1000:>10.2f}")
+    if not HAS_BROTLI:
+        print("(install brotli to include br)")
+    print()
+
+def bench_serialize(repeats: int, clients: int = 50):
+    """Serialiser cost on a 1000-line /api/logs payload, alone and for many polling clients"""
+    count = 1000
+    lines = synthetic_lines(count)
+    payload = {
+        'success': True, 'filename': 'ACTSentinel20250805.log', 'hasNewData': True,
+        'newLines': lines, 'totalLines': count, 'startSeq': 0, 'nextSeq': count, 'gap': False
+    }
+    print(f"JSON serialisation of a {count}-line payload")
+    print(f"{'serializer':<24} {'bytes':>9} {'ms':>8} {'vs stdlib':>10}")
+
+    candidates = [('json.dumps (stdlib)', lambda: json.dumps(payload).encode('utf-8'))]
+    candidates.append(('JsonSerializer', lambda: JsonSerializer().dumps(payload)))
+    if HAS_ORJSON:
+        candidates.append(('OrjsonSerializer', lambda: OrjsonSerializer().dumps(payload)))
+    candidates.append(('iter_json (streamed)', lambda: b''.join(iter_json(payload))))
+
+    baseline = None
+    for name, encode in candidates:
+        size = len(encode())
+        elapsed = _best_time(encode, repeats)
+        baseline = baseline or elapsed
+        print(f"{name:<24} {size:>9} {elapsed * 1000:>8.3f} {baseline / elapsed:>9.1f}x")
+
+    # Every client polling the same position: encode+gzip each time vs once
+    uncached = lambda: [compress_body(json.dumps(payload).encode('utf-8'), 'gzip') for _ in range(clients)]
+    def cached():
+        cache = ResponseCache()
+        for _ in range(clients):
+            entry = cache.get(0, 'key')
+            if entry is None:
+                body, coding = compress_body(dumps(payload), 'gzip')
+                cache.put(0, 'key', body, 'application/json', coding)
+    print(f"{clients} polling clients, json+gzip per client: {_best_time(uncached, repeats) * 1000:.2f} ms")
+    print(f"{clients} polling clients, ResponseCache:        {_best_time(cached, repeats) * 1000:.2f} ms")
+    if not HAS_ORJSON:
+        print("(install orjson to include it)")
+    print()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark ACT Sentinel log reader hot paths")
+    parser.add_argument('--size-mb', type=int, default=1024, help='Synthetic log size in MB (default: 1024)')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per measurement (best is reported)')
+    parser.add_argument('--keep', action='store_true', help='Keep the synthetic log file')
+    parser.add_argument('--only', choices=('tail', 'transport', 'serialize'), help='Run a single benchmark')
+    args = parser.parse_args()
+
+    print("=== ACT Sentinel Log Reader Benchmarks - Python ===\n")
+
+    if args.only in (None, 'transport'):
+        bench_transport(max(args.repeats, 5))
+    if args.only in (None, 'serialize'):
+        bench_serialize(max(args.repeats, 5))
+    if args.only in ('transport', 'serialize'):
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix='act_bench_'))
+    log_path = workdir / "ACTSentinel20250805.log"
+
+    print(f"Writing {args.size_mb} MB synthetic log to {log_path}...")
+    start = time.perf_counter()
+    written = write_synthetic_log(log_path, args.size_mb)
+    print(f"- Wrote {written / (1024 * 1024):.1f} MB in {time.perf_counter() - start:.1f}s\n")
+
+    try:
+        await bench_read_last_lines(log_path, args.repeats)
+    finally:
+        if not args.keep:
+            os.remove(log_path)
+            os.rmdir(workdir)
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\nBenchmark interrupted by user.")
+        sys.exit(1)
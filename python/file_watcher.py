@@ -0,0 +1,181 @@
+"""
+File Watcher for ACT Sentinel logs
+Decides when the tail engine polls next: inotify events where the mount
+delivers them, otherwise an adaptive poll interval
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import platform
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Poll interval bounds (seconds): tight while the log grows, backing off when idle
+POLL_MIN_INTERVAL = 0.2
+POLL_MAX_INTERVAL = 4.0
+POLL_BACKOFF = 1.5
+
+# Coalesce bursts of inotify events into one poll (seconds)
+INOTIFY_DEBOUNCE = 0.05
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+class AdaptivePoller:
+    """Poll interval that resets on activity and grows geometrically when idle"""
+
+    def __init__(
+        self,
+        min_interval: float = POLL_MIN_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+        backoff: float = POLL_BACKOFF
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+    def record(self, activity: bool) -> float:
+        """Update the interval after a poll and return it"""
+        if activity:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
+
+class InotifyWatcher:
+    """Directory change notifications through libc inotify (Linux only)"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.fd: Optional[int] = None
+        self._event = asyncio.Event()
+
+    @staticmethod
+    def _libc():
+        if platform.system().lower() != 'linux':
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1
+            libc.inotify_add_watch
+            return libc
+        except (OSError, AttributeError):
+            return None
+
+    def start(self) -> bool:
+        """Begin watching; False if inotify is unavailable for this directory"""
+        libc = self._libc()
+        if libc is None:
+            return False
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.debug(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return False
+
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        wd = libc.inotify_add_watch(fd, os.fsencode(str(self.directory)), mask)
+        if wd < 0:
+            logger.debug(f"inotify_add_watch failed for {self.directory}: {os.strerror(ctypes.get_errno())}")
+            os.close(fd)
+            return False
+
+        self.fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._on_readable)
+        return True
+
+    def _on_readable(self):
+        """Drain pending events; we only need to know something changed"""
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            logger.warning(f"inotify read failed: {e}")
+        self._event.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a change event; False on timeout"""
+        try:
+            async with asyncio.timeout(timeout):
+                await self._event.wait()
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self.fd)
+            except RuntimeError:
+                pass
+            os.close(self.fd)
+            self.fd = None
+
+class LogWatcher:
+    """Waits between tail polls
+
+    inotify on network mounts often only reports local writes, so events
+    shorten the wait but the adaptive poll always runs underneath.
+    """
+
+    def __init__(self, directory: Path, use_inotify: bool = True, poller: Optional[AdaptivePoller] = None):
+        self.directory = Path(directory)
+        self.use_inotify = use_inotify
+        self.poller = poller or AdaptivePoller()
+        self.inotify: Optional[InotifyWatcher] = None
+        self._started = False
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self.inotify else 'poll'
+
+    def _start(self):
+        self._started = True
+        if not self.use_inotify:
+            return
+        watcher = InotifyWatcher(self.directory)
+        if watcher.start():
+            self.inotify = watcher
+            logger.info(f"Watching {self.directory} with inotify")
+        else:
+            logger.info(f"inotify unavailable for {self.directory}, using adaptive polling")
+
+    def set_directory(self, directory: Path):
+        """Follow the reader to a different directory"""
+        if Path(directory) == self.directory:
+            return
+        self.close()
+        self.directory = Path(directory)
+
+    async def wait(self, activity: bool):
+        """Sleep until the next poll is due, given whether the last one found data"""
+        if not self._started:
+            self._start()
+
+        interval = self.poller.record(activity)
+        if self.inotify:
+            if await self.inotify.wait(interval):
+                # Let a burst of writes settle, then poll right away
+                await asyncio.sleep(INOTIFY_DEBOUNCE)
+        else:
+            await asyncio.sleep(interval)
+
+    def close(self):
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+        self._started = False
@@ -0,0 +1,219 @@
+"""
+Log History for ACT Sentinel logs
+Time-range queries and pagination across past days' log files
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from line_index import LineIndex, parse_line_timestamp
+from log_mirror import MirrorSource
+from log_reader import LogReader, READ_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per binary search probe
+PROBE_BYTES = 64 * 1024
+MAX_PAGE_LINES = 5000
+
+def encode_cursor(filename: str, offset: int) -> str:
+    """Opaque pagination cursor for a byte position in a log file"""
+    raw = json.dumps({'f': filename, 'o': offset}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return str(data['f']), int(data['o'])
+    except (binascii.Error, KeyError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+class LogHistory:
+    def __init__(self, log_reader: LogReader):
+        self.log_reader = log_reader
+
+    async def query(
+        self,
+        start: datetime,
+        end: datetime,
+        cursor: Optional[str] = None,
+        limit: int = 500,
+        timeout: float = 60.0
+    ) -> Dict[str, Any]:
+        """Return one page of lines timestamped within [start, end]"""
+        start_ms = int(start.timestamp() * 1000)
+        end_ms = int(end.timestamp() * 1000)
+        limit = max(1, min(limit, MAX_PAGE_LINES))
+
+        files = await self.log_reader.list_log_files(start.date(), end.date())
+        position = None
+        if cursor:
+            position = decode_cursor(cursor)
+            names = [f.name for f in files]
+            if position[0] not in names:
+                raise ValueError("Cursor does not match the requested range")
+            files = files[names.index(position[0]):]
+
+        lines: List[str] = []
+        next_cursor = None
+
+        async with asyncio.timeout(timeout):
+            for log_file in files:
+                source = await self.log_reader.mirror.source(log_file, self.log_reader.io)
+                resume = bool(position) and position[0] == log_file.name
+                if resume:
+                    offset = position[1]
+                else:
+                    offset = await self.find_offset(source, start_ms)
+
+                page, end_offset, finished = await self._run(
+                    source, self._read_page, source, offset, start_ms, end_ms,
+                    limit - len(lines), resume
+                )
+                lines.extend(page)
+
+                if not finished:
+                    next_cursor = encode_cursor(log_file.name, end_offset)
+                    break
+
+        return {
+            'success': True,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'lines': lines,
+            'totalLines': len(lines),
+            'cursor': next_cursor,
+            'done': next_cursor is None,
+            'files': [f.name for f in files],
+            'timestamp': datetime.now().isoformat()
+        }
+
+    async def _run(self, source: MirrorSource, func, *args):
+        """Run a blocking read off the loop; fully mirrored files stay off the share pool"""
+        if source.local:
+            return await asyncio.to_thread(func, *args)
+        return await self.log_reader.run_io(func, *args)
+
+    async def find_offset(self, source: MirrorSource, timestamp_ms: int) -> int:
+        """Byte offset at or before the first line stamped >= timestamp_ms"""
+        log_file = Path(source.path)
+        if source.local:
+            size, mtime_ns = source.size, source.mtime_ns
+        else:
+            stat_result = await self.log_reader.run_io(log_file.stat)
+            size, mtime_ns = stat_result.st_size, stat_result.st_mtime_ns
+        low, high = 0, size
+
+        # Narrow the search window with the local sidecar index when present
+        index = LineIndex(log_file)
+        if await asyncio.to_thread(index.load, size, mtime_ns):
+            low, line_no = index.seek_time(timestamp_ms)
+            block = line_no // index.stride + 1
+            if block < index.block_count:
+                high = index.offsets[block]
+
+        return await self._run(source, self._bisect, source, low, high, timestamp_ms)
+
+    def _bisect(self, source: MirrorSource, low: int, high: int, timestamp_ms: int) -> int:
+        """Binary search on byte offsets, one block read per probe"""
+        with source.open() as f:
+            while high - low > PROBE_BYTES:
+                middle = (low + high) // 2
+                f.seek(middle)
+                block = f.read(PROBE_BYTES)
+                newline = block.find(b'\n')
+                if newline == -1:
+                    high = middle
+                    continue
+
+                line_start = middle + newline + 1
+                stamp = None
+                for line in block[newline + 1:].split(b'\n')[:-1]:
+                    stamp = parse_line_timestamp(line)
+                    if stamp is not None:
+                        break
+
+                if stamp is not None and stamp < timestamp_ms:
+                    low = line_start
+                else:
+                    # Later, or undecidable from this block: stay conservative
+                    high = middle
+        return low
+
+    def _read_page(
+        self,
+        source: MirrorSource,
+        offset: int,
+        start_ms: int,
+        end_ms: int,
+        limit: int,
+        resume: bool = False
+    ) -> Tuple[List[str], int, bool]:
+        """Read up to limit in-range lines from offset
+
+        Lines without a timestamp (stack traces) follow the line before them;
+        a resumed page starts inside the range. Returns the lines, the offset
+        to resume from and whether the file holds no further lines in range.
+        """
+        lines: List[str] = []
+        in_range = resume
+        pos = offset
+        partial = b''
+
+        with source.open() as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                buffer = partial + chunk if partial else chunk
+                start = 0
+                while True:
+                    newline = buffer.find(b'\n', start)
+                    if newline == -1:
+                        break
+                    line = buffer[start:newline]
+                    line_start = pos + start
+                    start = newline + 1
+
+                    stamp = parse_line_timestamp(line)
+                    if stamp is not None:
+                        if stamp > end_ms:
+                            return lines, line_start, True
+                        in_range = stamp >= start_ms
+                    if in_range and line.strip():
+                        if len(lines) >= limit:
+                            return lines, line_start, False
+                        lines.append(line.decode('utf-8', errors='ignore').rstrip('\r'))
+                pos += start
+                partial = buffer[start:]
+
+        if partial.strip():
+            # Unterminated last line of the file
+            stamp = parse_line_timestamp(partial)
+            if stamp is not None:
+                in_range = start_ms <= stamp <= end_ms
+            if in_range:
+                if len(lines) >= limit:
+                    return lines, pos, False
+                lines.append(partial.decode('utf-8', errors='ignore').rstrip('\r'))
+        return lines, pos + len(partial), True
+
+def parse_query_time(value: Optional[str], default: Optional[datetime] = None) -> datetime:
+    """Parse an ISO-8601 query parameter such as 2025-08-05T02:00"""
+    if not value:
+        if default is None:
+            raise ValueError("Missing time parameter")
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', expected ISO-8601 like 2025-08-05T02:00")
@@ -0,0 +1,214 @@
+"""
+Line Offset Index for ACT Sentinel logs
+Local sidecar index of byte offsets and timestamps per block of lines
+"""
+
+import logging
+import re
+import struct
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sidecar indexes live on local disk, never on the share
+INDEX_DIR = Path('cache') / 'index'
+INDEX_STRIDE = 1000
+
+# Leading timestamp such as "2025-08-05 14:30:45.123"
+TIMESTAMP_PATTERN = re.compile(
+    rb'^\s*(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,6}))?'
+)
+TIMESTAMP_PREFIX_BYTES = 64
+
+_MAGIC = b'ACTIDX01'
+_HEADER = struct.Struct('<8sIqqqqqq')
+
+def parse_line_timestamp(line: bytes) -> Optional[int]:
+    """Parse the leading timestamp of a raw log line into epoch milliseconds"""
+    match = TIMESTAMP_PATTERN.match(line, 0, TIMESTAMP_PREFIX_BYTES)
+    if not match:
+        return None
+    try:
+        year, month, day, hour, minute, second = (int(g) for g in match.groups()[:6])
+        fraction = match.group(7) or b'0'
+        millis = int(fraction.ljust(3, b'0')[:3])
+        stamp = datetime(year, month, day, hour, minute, second)
+        return int(stamp.timestamp()) * 1000 + millis
+    except ValueError:
+        return None
+
+class LineIndex:
+    """Byte offset of every INDEX_STRIDE-th line plus the first timestamp per block"""
+
+    def __init__(self, log_file: Path, index_dir: Path = INDEX_DIR, stride: int = INDEX_STRIDE):
+        self.log_file = Path(log_file)
+        self.index_path = Path(index_dir) / f"{self.log_file.name}.idx"
+        self.stride = stride
+        self.reset()
+
+    def reset(self):
+        """Forget everything indexed so far"""
+        # Block b starts at line b * stride
+        self.offsets = array('q')
+        self.timestamps = array('q')
+        self.line_count = 0
+        self.scanned_bytes = 0
+        self.file_mtime_ns = 0
+        self.dirty = False
+        self._search_stamps: Optional[list] = None
+        # Bytes of the current line while its block still lacks a timestamp
+        self._pending = b''
+        self._need_timestamp = False
+
+    @property
+    def block_count(self) -> int:
+        return len(self.offsets)
+
+    def load(self, size: int, mtime_ns: int) -> bool:
+        """Resume from the sidecar if it still matches the file's size/mtime"""
+        try:
+            data = self.index_path.read_bytes()
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Could not read index {self.index_path}: {e}")
+            return False
+
+        try:
+            magic, stride, scanned, line_count, stored_mtime, blocks, need_ts, pending_len = \
+                _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC or stride != self.stride:
+                return False
+            if size < scanned or (size == scanned and mtime_ns != stored_mtime):
+                # Truncated or rewritten in place: the offsets are meaningless now
+                logger.info(f"Discarding stale index for {self.log_file.name}")
+                return False
+
+            pos = _HEADER.size
+            offsets = array('q')
+            offsets.frombytes(data[pos:pos + blocks * 8])
+            pos += blocks * 8
+            timestamps = array('q')
+            timestamps.frombytes(data[pos:pos + blocks * 8])
+            pos += blocks * 8
+            pending = data[pos:pos + pending_len]
+        except (struct.error, ValueError) as e:
+            logger.warning(f"Corrupt index {self.index_path}: {e}")
+            return False
+
+        if len(offsets) != blocks or len(timestamps) != blocks:
+            return False
+
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self.line_count = line_count
+        self.scanned_bytes = scanned
+        self.file_mtime_ns = stored_mtime
+        self._need_timestamp = bool(need_ts)
+        self._pending = pending
+        self.dirty = False
+        self._search_stamps = None
+        logger.info(f"Resumed index for {self.log_file.name} at {scanned} bytes, {line_count} lines")
+        return True
+
+    def save(self):
+        """Write the sidecar atomically"""
+        if not self.dirty:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        header = _HEADER.pack(
+            _MAGIC, self.stride, self.scanned_bytes, self.line_count,
+            self.file_mtime_ns, len(self.offsets), int(self._need_timestamp), len(self._pending)
+        )
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(self.offsets.tobytes())
+            f.write(self.timestamps.tobytes())
+            f.write(self._pending)
+        tmp_path.replace(self.index_path)
+        self.dirty = False
+
+    def feed(self, offset: int, data: bytes) -> bool:
+        """Index bytes read from the file; only contiguous data is accepted"""
+        if offset < self.scanned_bytes < offset + len(data):
+            # Overlaps what we already scanned; keep only the new tail
+            data = data[self.scanned_bytes - offset:]
+            offset = self.scanned_bytes
+        if offset != self.scanned_bytes or not data:
+            return False
+
+        stride = self.stride
+        start = 0
+        size = len(data)
+
+        while start < size:
+            if self.line_count % stride == 0 and len(self.offsets) * stride == self.line_count:
+                # A new block begins at this line
+                self.offsets.append(offset + start)
+                self.timestamps.append(-1)
+                self._need_timestamp = True
+                self._pending = b''
+
+            if not self._need_timestamp:
+                # Skip straight to the line that starts the next block
+                to_boundary = stride - self.line_count % stride
+                newlines = data.count(b'\n', start)
+                if newlines < to_boundary:
+                    self.line_count += newlines
+                    start = size
+                    break
+                newline = start - 1
+                for _ in range(to_boundary):
+                    newline = data.find(b'\n', newline + 1)
+                self.line_count += to_boundary
+                start = newline + 1
+                continue
+
+            newline = data.find(b'\n', start)
+            end = size if newline == -1 else newline
+            if len(self._pending) < TIMESTAMP_PREFIX_BYTES:
+                self._pending += data[start:min(end, start + TIMESTAMP_PREFIX_BYTES)]
+            if newline == -1:
+                start = size
+                break
+
+            stamp = parse_line_timestamp(self._pending)
+            if stamp is not None:
+                self.timestamps[-1] = stamp
+                self._need_timestamp = False
+            self._pending = b''
+            self.line_count += 1
+            start = newline + 1
+
+        self.scanned_bytes = offset + size
+        self.dirty = True
+        self._search_stamps = None
+        return True
+
+    def seek_line(self, line_no: int) -> Tuple[int, int]:
+        """Return (byte offset, line number) of the block holding line_no"""
+        if not self.offsets:
+            return 0, 0
+        block = min(max(line_no, 0) // self.stride, len(self.offsets) - 1)
+        return self.offsets[block], block * self.stride
+
+    def seek_time(self, timestamp_ms: int) -> Tuple[int, int]:
+        """Return (byte offset, line number) of the last block starting at or before timestamp_ms"""
+        if not self.offsets:
+            return 0, 0
+        if self._search_stamps is None:
+            # Blocks without a timestamp inherit the previous block's
+            stamps = []
+            last = -1
+            for stamp in self.timestamps:
+                if stamp != -1:
+                    last = stamp
+                stamps.append(last)
+            self._search_stamps = stamps
+        block = max(bisect_right(self._search_stamps, timestamp_ms) - 1, 0)
+        return self.offsets[block], block * self.stride
@@ -0,0 +1,170 @@
+"""
+Log Catalog for ACT Sentinel log shares
+Cached listing of the daily log files in one directory
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from share_io import share_executor
+
+logger = logging.getLogger(__name__)
+
+LOG_NAME_PATTERN = re.compile(r'^ACTSentinel(\d{8})\.log$')
+
+# Calls within this many seconds of a refresh reuse it without touching the share
+CATALOG_MIN_INTERVAL = 1.0
+# Relist even if the directory mtime did not move; some SMB clients cache it
+CATALOG_MAX_AGE = 60.0
+# Newest files (by name date) stat'ed to pick the most recently written one
+CATALOG_STAT_CANDIDATES = 3
+# How long the pick stays valid while the listing is unchanged
+CATALOG_STAT_TTL = 30.0
+
+def log_file_date(name: str) -> Optional[date]:
+    """Date encoded in an ACTSentinelYYYYMMDD.log file name"""
+    match = LOG_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y%m%d').date()
+    except ValueError:
+        return None
+
+def _is_log_name(name: str) -> bool:
+    return name.startswith('ACTSentinel') and name.endswith('.log')
+
+def _scan(directory: Path, known_mtime_ns: Optional[int]) -> Tuple[int, Optional[List[str]]]:
+    """Stat the directory and list it only if its mtime moved; runs on the share pool"""
+    mtime_ns = os.stat(directory).st_mtime_ns
+    if mtime_ns == known_mtime_ns:
+        return mtime_ns, None
+    with os.scandir(directory) as entries:
+        return mtime_ns, [entry.name for entry in entries if _is_log_name(entry.name)]
+
+def _stat_mtimes(paths: List[Path]) -> Dict[str, int]:
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path.name] = path.stat().st_mtime_ns
+        except OSError:
+            pass
+    return mtimes
+
+class LogCatalog:
+    """ACTSentinel*.log names in one directory, refreshed by directory mtime
+
+    The steady state costs one remote stat of the directory per refresh;
+    the directory is only listed again when its mtime changes (a file was
+    created, renamed or removed) or CATALOG_MAX_AGE has passed. Dates come
+    from the file names, so only the newest few files are ever stat'ed.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.io = share_executor(self.directory)
+        self.dir_mtime_ns: Optional[int] = None
+        # name -> date from the name, None for names without one
+        self.files: Dict[str, Optional[date]] = {}
+        self.refreshed_at = 0.0
+        self.listed_at = 0.0
+        self.scans = 0
+        self.listings = 0
+        self._latest: Optional[str] = None
+        self._latest_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.files
+
+    async def refresh(self, force: bool = False, recheck: bool = False):
+        """Bring the listing up to date; concurrent callers share one scan
+
+        force relists unconditionally; recheck skips CATALOG_MIN_INTERVAL
+        but still only relists if the directory mtime moved.
+        """
+        async with self._lock:
+            now = time.monotonic()
+            if not (force or recheck) and self.dir_mtime_ns is not None and now - self.refreshed_at < CATALOG_MIN_INTERVAL:
+                return
+            known = None if force or now - self.listed_at > CATALOG_MAX_AGE else self.dir_mtime_ns
+            mtime_ns, names = await self.io.run(_scan, self.directory, known)
+            self.scans += 1
+            self.refreshed_at = time.monotonic()
+            self.dir_mtime_ns = mtime_ns
+            if names is not None:
+                self.listings += 1
+                self.listed_at = self.refreshed_at
+                if set(names) != self.files.keys():
+                    self.files = {name: log_file_date(name) for name in names}
+                    self._latest = None
+
+    def dated(self, first: Optional[date] = None, last: Optional[date] = None) -> List[Tuple[date, str]]:
+        """(date, name) of dated files within [first, last], oldest first"""
+        return sorted(
+            (file_date, name) for name, file_date in self.files.items()
+            if file_date and not (first and file_date < first) and not (last and file_date > last)
+        )
+
+    async def list_files(self, first: Optional[date] = None, last: Optional[date] = None) -> List[Path]:
+        """Daily log files whose name date falls within [first, last], oldest first"""
+        await self.refresh()
+        return [self.directory / name for _, name in self.dated(first, last)]
+
+    async def has_file(self, name: str) -> bool:
+        """Whether name is listed; a miss rechecks the directory so new files show up at once"""
+        await self.refresh()
+        if name not in self.files:
+            await self.refresh(recheck=True)
+        return name in self.files
+
+    async def latest_file(self) -> Optional[Path]:
+        """Most recently written log file, stat'ing only the newest candidates"""
+        await self.refresh()
+        if not self.files:
+            return None
+        now = time.monotonic()
+        if self._latest in self.files and now - self._latest_at < CATALOG_STAT_TTL:
+            return self.directory / self._latest
+
+        candidates = [name for _, name in self.dated()[-CATALOG_STAT_CANDIDATES:]]
+        if not candidates:
+            # No dated names at all; fall back to every matching file
+            candidates = list(self.files)
+        mtimes = await self.io.run(_stat_mtimes, [self.directory / name for name in candidates])
+        if not mtimes:
+            return None
+        self._latest = max(mtimes, key=lambda name: (mtimes[name], name))
+        self._latest_at = now
+        return self.directory / self._latest
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'directory': str(self.directory),
+            'files': len(self.files),
+            'scans': self.scans,
+            'listings': self.listings,
+            'age': round(time.monotonic() - self.refreshed_at, 1) if self.refreshed_at else None
+        }
+
+_catalogs: Dict[str, LogCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def log_catalog(directory) -> LogCatalog:
+    """The catalog for a directory, created on first use"""
+    key = str(directory)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = LogCatalog(key)
+        return catalog
@@ -0,0 +1,439 @@
+"""
+Log Mirror for ACT Sentinel logs
+Local append-only copy of the share's daily log files
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, NamedTuple, Set, Tuple
+
+from log_catalog import log_file_date
+from metrics import MIRROR_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Mirrors live on local disk next to the line indexes
+MIRROR_DIR = Path('cache') / 'mirror'
+# Bytes at the end of the mirrored prefix compared with the share before reuse
+MIRROR_VERIFY_BYTES = 4096
+# A verify read still running after this long leaves the mirror unverified (seconds)
+MIRROR_VERIFY_TIMEOUT = 10.0
+# Background copy of closed files: read size and rate limit (bytes per second)
+MIRROR_BACKFILL_CHUNK = 1024 * 1024
+MIRROR_BACKFILL_RATE = 4 * 1024 * 1024
+# Pause between backfill passes once everything is copied (seconds)
+MIRROR_BACKFILL_INTERVAL = 60.0
+# Daily files older than this are neither backfilled nor kept
+MIRROR_RETENTION_DAYS = 30
+
+class MirrorSource(NamedTuple):
+    """Where to read one log file from; picklable for the search pool
+
+    Bytes [0, mirrored) come from the local mirror. size is set when the
+    mirror holds the whole (closed) file, otherwise reads past the
+    mirrored prefix continue on the share.
+    """
+
+    path: str
+    mirror_path: Optional[str] = None
+    mirrored: int = 0
+    size: Optional[int] = None
+    mtime_ns: int = 0
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+    @property
+    def local(self) -> bool:
+        return self.size is not None
+
+    def open(self) -> 'MirroredReader':
+        return MirroredReader(self)
+
+class MirroredReader:
+    """Binary file-like reader over a MirrorSource
+
+    The mirrored prefix is read through mmap; the share file is only
+    opened if a read goes past it.
+    """
+
+    def __init__(self, source: MirrorSource):
+        self.source = source
+        self.pos = 0
+        self._map: Optional[mmap.mmap] = None
+        self._share = None
+        if source.mirrored:
+            with open(source.mirror_path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), source.mirrored, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._share is not None:
+            self._share.close()
+            self._share = None
+
+    def seek(self, pos: int) -> int:
+        self.pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def _share_file(self):
+        if self._share is None:
+            self._share = open(self.source.path, 'rb')
+        self._share.seek(self.pos)
+        return self._share
+
+    def read(self, size: int = -1) -> bytes:
+        mirrored = self.source.mirrored
+        head = b''
+        if self.pos < mirrored:
+            end = mirrored if size < 0 else min(mirrored, self.pos + size)
+            head = self._map[self.pos:end]
+            self.pos = end
+            if size >= 0:
+                size -= len(head)
+        if size == 0 or self.source.local:
+            return head
+        tail = self._share_file().read(size)
+        self.pos += len(tail)
+        return head + tail if head else tail
+
+    def readline(self) -> bytes:
+        mirrored = self.source.mirrored
+        head = b''
+        if self.pos < mirrored:
+            newline = self._map.find(b'\n', self.pos, mirrored)
+            end = mirrored if newline == -1 else newline + 1
+            head = self._map[self.pos:end]
+            self.pos = end
+            if newline != -1:
+                return head
+        if self.source.local:
+            return head
+        tail = self._share_file().readline()
+        self.pos += len(tail)
+        return head + tail if head else tail
+
+def _verify(
+    share_path: Path,
+    mirror_path: Path,
+    size: int,
+    trusted: Optional[Tuple[int, int]]
+) -> Tuple[bool, int, int]:
+    """Check a mirrored prefix against the share; runs on the share pool
+
+    Returns (matches, share size, share mtime). A complete mirror whose
+    source size and mtime are unchanged is trusted without reading.
+    """
+    stat_result = os.stat(share_path)
+    if size == 0:
+        return True, stat_result.st_size, stat_result.st_mtime_ns
+    if stat_result.st_size < size:
+        return False, stat_result.st_size, stat_result.st_mtime_ns
+    if (stat_result.st_size, stat_result.st_mtime_ns) == trusted:
+        return True, stat_result.st_size, stat_result.st_mtime_ns
+
+    start = max(0, size - MIRROR_VERIFY_BYTES)
+    with open(share_path, 'rb') as f:
+        f.seek(start)
+        remote = f.read(size - start)
+    with open(mirror_path, 'rb') as f:
+        f.seek(start)
+        local = f.read(size - start)
+    return remote == local, stat_result.st_size, stat_result.st_mtime_ns
+
+def _read_chunk(path: Path, offset: int, length: int) -> bytes:
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(length)
+
+class MirrorFile:
+    """Mirrored prefix of one daily log file plus its metadata sidecar
+
+    The mirrored byte count is the local file's size, so a crash can at
+    worst lose a tail that the next feed or backfill writes again.
+    """
+
+    def __init__(self, name: str, mirror_dir: Path = MIRROR_DIR):
+        self.name = name
+        self.path = Path(mirror_dir) / name
+        self.meta_path = Path(mirror_dir) / f"{name}.meta"
+        self.size = 0
+        # Only verified mirrors are appended to or read from
+        self.verified = False
+        # Set once a closed file is copied in full
+        self.complete = False
+        self.source_size = 0
+        self.source_mtime_ns = 0
+        self._handle = None
+
+    def load(self):
+        """Pick up what an earlier run mirrored"""
+        try:
+            self.size = self.path.stat().st_size
+        except FileNotFoundError:
+            self.size = 0
+            return
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            self.complete = bool(meta.get('complete'))
+            self.source_size = int(meta.get('sourceSize', 0))
+            self.source_mtime_ns = int(meta.get('sourceMtimeNs', 0))
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, OSError) as e:
+            logger.warning(f"Ignoring corrupt mirror metadata {self.meta_path}: {e}")
+        if self.complete and self.size != self.source_size:
+            self.complete = False
+
+    def save_meta(self):
+        """Write the sidecar atomically"""
+        self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({
+            'complete': self.complete,
+            'sourceSize': self.source_size,
+            'sourceMtimeNs': self.source_mtime_ns
+        }))
+        tmp_path.replace(self.meta_path)
+
+    def append(self, offset: int, data: bytes) -> int:
+        """Append bytes read from the share at offset; returns the bytes written
+
+        Only contiguous data is accepted; bytes we already hold are skipped.
+        """
+        if offset < self.size < offset + len(data):
+            data = data[self.size - offset:]
+            offset = self.size
+        if offset != self.size or not data:
+            return 0
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, 'ab', buffering=0)
+        self._handle.write(data)
+        self.size += len(data)
+        return len(data)
+
+    def reset(self):
+        """Drop the mirrored bytes after the source was truncated or replaced"""
+        self.close()
+        self.complete = False
+        self.source_size = 0
+        self.source_mtime_ns = 0
+        try:
+            with open(self.path, 'wb'):
+                pass
+            self.size = 0
+            self.save_meta()
+        except OSError as e:
+            # Mapped by a reader on Windows; stop using it until the next start
+            logger.warning(f"Could not reset mirror {self.path}: {e}")
+            self.verified = False
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+class LogMirror:
+    """Local append-only mirror of the daily log files
+
+    The live tail hands every byte it reads from the share to feed(), and
+    a background task copies closed files at MIRROR_BACKFILL_RATE. History,
+    search and replay read through source(), which serves the mirrored
+    prefix locally and leaves only the rest to the share.
+    """
+
+    def __init__(self, mirror_dir: Path = MIRROR_DIR):
+        self.directory = Path(mirror_dir)
+        self.files: Dict[str, MirrorFile] = {}
+        self.written = 0
+        self.backfilled = 0
+        self.resets = 0
+        self._lock = asyncio.Lock()
+
+    async def open(self, log_file: Path, io) -> MirrorFile:
+        """The mirror for log_file, loaded and verified against the share on first use"""
+        async with self._lock:
+            mirror = self.files.get(log_file.name)
+            if mirror is None:
+                mirror = MirrorFile(log_file.name, self.directory)
+                await asyncio.to_thread(mirror.load)
+                self.files[log_file.name] = mirror
+            if mirror.verified:
+                return mirror
+
+            try:
+                # Bounded: callers such as the tail engine hold their own locks meanwhile
+                matches, size, mtime_ns = await asyncio.wait_for(io.run(
+                    _verify, log_file, mirror.path, mirror.size,
+                    (mirror.source_size, mirror.source_mtime_ns) if mirror.complete else None
+                ), timeout=MIRROR_VERIFY_TIMEOUT)
+            except (OSError, asyncio.TimeoutError) as e:
+                # A complete copy was verified when it was finished; serve it while the share is down
+                mirror.verified = mirror.complete
+                logger.warning(f"Could not verify mirror of {log_file.name}: {str(e) or 'timed out'}")
+                return mirror
+
+            mirror.verified = True
+            if not matches:
+                logger.warning(f"Mirror of {log_file.name} no longer matches the share, discarding it")
+                self.resets += 1
+                await asyncio.to_thread(mirror.reset)
+            elif mirror.complete and (size, mtime_ns) != (mirror.source_size, mirror.source_mtime_ns):
+                # The closed file changed after all; copy the rest
+                mirror.complete = False
+            return mirror
+
+    def feed(self, name: str, offset: int, data: bytes):
+        """Append bytes the tail just read from the share, if they continue the mirror"""
+        mirror = self.files.get(name)
+        if mirror is None or not mirror.verified:
+            return
+        try:
+            written = mirror.append(offset, data)
+        except OSError as e:
+            logger.warning(f"Could not write mirror {mirror.path}: {e}")
+            mirror.verified = False
+            return
+        if written:
+            self.written += written
+            MIRROR_BYTES.labels('tail').inc(written)
+
+    def reset(self, name: str):
+        """Forget a file's mirrored bytes after it was truncated or replaced"""
+        mirror = self.files.get(name)
+        if mirror is not None and mirror.size:
+            self.resets += 1
+            mirror.reset()
+
+    def mirrored(self, name: str) -> int:
+        mirror = self.files.get(name)
+        return mirror.size if mirror is not None and mirror.verified else 0
+
+    async def source(self, log_file: Path, io) -> MirrorSource:
+        """How to read log_file: from the mirror as far as it goes, then the share"""
+        try:
+            mirror = await self.open(log_file, io)
+        except Exception as e:
+            logger.warning(f"Mirror unavailable for {log_file.name}: {e}")
+            return MirrorSource(str(log_file))
+        if not mirror.verified or not mirror.size:
+            return MirrorSource(str(log_file))
+        return MirrorSource(
+            str(log_file), os.path.abspath(mirror.path), mirror.size,
+            mirror.size if mirror.complete else None, mirror.source_mtime_ns
+        )
+
+    async def run_backfill(self, log_reader):
+        """Copy closed files, and the current file up to the tail cursor, forever"""
+        logger.info("Starting mirror backfill")
+        try:
+            while True:
+                try:
+                    copied = await self.backfill_once(log_reader)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Mirror backfill failed: {e}")
+                    copied = 0
+                if not copied:
+                    await asyncio.sleep(MIRROR_BACKFILL_INTERVAL)
+        finally:
+            for mirror in self.files.values():
+                mirror.close()
+
+    async def backfill_once(self, log_reader, max_bytes: int = 64 * MIRROR_BACKFILL_CHUNK) -> int:
+        """One rate-limited backfill step, newest files first; returns bytes copied"""
+        oldest = date.today() - timedelta(days=MIRROR_RETENTION_DAYS)
+        for name in await asyncio.to_thread(self._prune, oldest):
+            mirror = self.files.pop(name, None)
+            if mirror is not None:
+                mirror.close()
+
+        copied = 0
+        files = await log_reader.list_log_files(first=oldest)
+        for log_file in reversed(files):
+            io = log_reader.io
+            mirror = await self.open(log_file, io)
+            if not mirror.verified or mirror.complete:
+                continue
+
+            current = log_file.name == getattr(log_reader.current_log_file, 'name', None)
+            if current:
+                # The tail appends from its cursor on; fill in what lies before it
+                target, mtime_ns = log_reader.last_size, 0
+            else:
+                stat_result = await io.run(log_file.stat)
+                target, mtime_ns = stat_result.st_size, stat_result.st_mtime_ns
+
+            while mirror.size < target and copied < max_bytes:
+                offset = mirror.size
+                chunk = await io.run(_read_chunk, log_file, offset, min(MIRROR_BACKFILL_CHUNK, target - offset))
+                if not chunk:
+                    break
+                # Appended on the loop like feed(), so the two never interleave
+                written = mirror.append(offset, chunk)
+                copied += written
+                self.backfilled += written
+                MIRROR_BYTES.labels('backfill').inc(written)
+                await asyncio.sleep(len(chunk) / MIRROR_BACKFILL_RATE)
+
+            if not current and mirror.size >= target:
+                mirror.complete = True
+                mirror.source_size = target
+                mirror.source_mtime_ns = mtime_ns
+                mirror.close()
+                await asyncio.to_thread(mirror.save_meta)
+                logger.info(f"Mirrored {log_file.name} ({target} bytes)")
+            if copied >= max_bytes:
+                break
+        return copied
+
+    def _prune(self, oldest: date) -> Set[str]:
+        """Delete mirrors of files older than the retention window; returns their log names
+
+        Runs off the loop and only touches the filesystem; the caller drops
+        the deleted names from self.files.
+        """
+        deleted = set()
+        if not self.directory.exists():
+            return deleted
+        for path in self.directory.iterdir():
+            name = path.name[:-5] if path.name.endswith('.meta') else path.name
+            file_date = log_file_date(name)
+            if file_date and file_date < oldest:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"Could not delete old mirror {path}: {e}")
+                deleted.add(name)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        mirrors = [m for m in self.files.values() if m.verified]
+        return {
+            'directory': str(self.directory),
+            'files': len(mirrors),
+            'complete': sum(1 for m in mirrors if m.complete),
+            'bytes': sum(m.size for m in mirrors),
+            'written': self.written,
+            'backfilled': self.backfilled,
+            'resets': self.resets
+        }
@@ -5,20 +5,67 @@ Handles reading and monitoring of log files with robust error handling
 
 import asyncio
 import logging
-from datetime import datetime
+import os
+from collections import deque
+from datetime import datetime, date
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import aiofiles
 
+from line_index import LineIndex
+from log_catalog import LogCatalog, log_catalog
+from log_mirror import LogMirror, MirrorSource
+from metrics import FILE_READ_SECONDS, FILE_STAT_SECONDS, TAIL_READ_SECONDS, timed
+from share_io import ShareExecutor, share_executor
+
 logger = logging.getLogger(__name__)
 
+# Incremental read limits (bytes)
+READ_CHUNK_SIZE = 256 * 1024
+MAX_BYTES_PER_POLL = 8 * 1024 * 1024
+MAX_LINE_BYTES = 1024 * 1024
+
+# Reverse tail block sizes (bytes), grown geometrically per read
+TAIL_BLOCK_MIN = 64 * 1024
+TAIL_BLOCK_MAX = 1024 * 1024
+
+# Line index catch-up budget per poll (bytes) and save interval (seconds)
+INDEX_CATCHUP_BYTES = 4 * 1024 * 1024
+INDEX_SAVE_INTERVAL = 30.0
+
 class LogReader:
     def __init__(self, smb_path: str):
         self.smb_path = Path(smb_path)
+        self.io: ShareExecutor = share_executor(self.smb_path)
+        self.catalog: LogCatalog = log_catalog(self.smb_path)
         self.current_log_file: Optional[Path] = None
         self.last_size = 0
+        self.partial_line = b''
         self.last_check = None
+        self.file_identity = None
+        self.last_mtime_ns = 0
+        self.line_index: Optional[LineIndex] = None
+        self._index_saved_at = 0.0
+        # Shared by every mount of the share, so it survives path switches
+        self.mirror = LogMirror()
         
+    def switch_path(self, smb_path: str):
+        """Read the same share through another mount, keeping the byte cursor"""
+        self.smb_path = Path(smb_path)
+        self.io = share_executor(self.smb_path)
+        self.catalog = log_catalog(self.smb_path)
+        if self.current_log_file:
+            self.current_log_file = self.smb_path / self.current_log_file.name
+            if self.line_index:
+                self.line_index.log_file = self.current_log_file
+        # Inodes and mtime granularity differ between mounts of one share
+        self.file_identity = None
+        self.last_mtime_ns = 0
+    
+    async def run_io(self, func, *args):
+        """Run a blocking call against the share on its own bounded pool"""
+        return await self.io.run(func, *args)
+    
     async def get_current_log_file(self) -> Optional[Path]:
         """Get the current log file based on today's date"""
         today = datetime.now().strftime('%Y%m%d')
@@ -26,7 +73,7 @@ class LogReader:
         
         try:
             # Check if today's file exists
-            if await asyncio.to_thread(today_file.exists):
+            if await self.catalog.has_file(today_file.name):
                 logger.debug(f"Found today's log file: {today_file}")
                 return today_file
             
@@ -46,123 +93,297 @@ class LogReader:
     async def find_most_recent_log_file(self) -> Optional[Path]:
         """Find the most recent ACTSentinel log file"""
         try:
-            log_files = await asyncio.to_thread(
-                lambda: list(self.smb_path.glob("ACTSentinel*.log"))
-            )
-            
-            if not log_files:
-                return None
-            
-            # Sort by modification time (most recent first)
-            def get_mtime(file_path):
-                try:
-                    return file_path.stat().st_mtime
-                except Exception:
-                    return 0
-            
-            most_recent = await asyncio.to_thread(
-                lambda: max(log_files, key=get_mtime)
-            )
-            
-            return most_recent
-            
+            return await self.catalog.latest_file()
         except Exception as e:
             logger.error(f"Error finding most recent log file: {e}")
             return None
     
-    async def read_file_with_timeout(
-        self, 
-        file_path: Path, 
-        start_pos: int = 0, 
+    async def list_log_files(
+        self,
+        first: Optional[date] = None,
+        last: Optional[date] = None
+    ) -> List[Path]:
+        """Daily log files whose name date falls within [first, last], oldest first"""
+        return await self.catalog.list_files(first, last)
+    
+    @timed(FILE_READ_SECONDS)
+    async def read_new_lines(
+        self,
+        file_path: Path,
+        start_pos: int,
+        end_pos: int,
+        partial: bytes = b'',
+        max_lines: int = 1000,
+        max_bytes: int = MAX_BYTES_PER_POLL,
         timeout: float = 30.0
-    ) -> Optional[str]:
-        """Read file content with timeout handling"""
+    ) -> Optional[Dict[str, Any]]:
+        """Read complete lines between two byte offsets in bounded binary chunks
+
+        `partial` holds the bytes of an unterminated line that precede
+        start_pos. Returns the decoded lines, the new byte cursor, the
+        partial line to carry into the next read, the byte range skipped
+        when the gap exceeded max_bytes and whether lines remain unread.
+        """
+        skipped = None
+        skip_head = False
+        if end_pos - start_pos > max_bytes:
+            # Too far behind: jump to a tail window and drop the cut line
+            new_start = end_pos - max_bytes
+            skipped = {'from': start_pos, 'to': new_start}
+            logger.warning(f"Skipping {new_start - start_pos} bytes of {file_path}")
+            start_pos = new_start
+            partial = b''
+            skip_head = True
+
+        lines: List[bytes] = []
+        pos = start_pos
+        has_more = False
+
         try:
             async with asyncio.timeout(timeout):
-                async with aiofiles.open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    await f.seek(start_pos)
-                    content = await f.read()
-                    return content
+                async with aiofiles.open(file_path, 'rb', executor=self.io) as f:
+                    await f.seek(pos)
+
+                    while pos < end_pos:
+                        chunk = await f.read(min(READ_CHUNK_SIZE, end_pos - pos))
+                        if not chunk:
+                            break
+                        self._feed_index(file_path, pos, chunk)
+                        pos += len(chunk)
+
+                        buffer = partial + chunk if partial else chunk
+                        start = 0
+                        while True:
+                            newline = buffer.find(b'\n', start)
+                            if newline == -1:
+                                break
+                            line = buffer[start:newline]
+                            start = newline + 1
+                            if skip_head:
+                                skip_head = False
+                            elif line.strip():
+                                lines.append(line)
+                                if len(lines) >= max_lines:
+                                    break
+                        partial = buffer[start:]
+
+                        if len(lines) >= max_lines and (partial.find(b'\n') != -1 or pos < end_pos):
+                            # Leave the rest for the next read
+                            pos -= len(partial)
+                            partial = b''
+                            has_more = True
+                            break
+
+                        if len(partial) > MAX_LINE_BYTES:
+                            # Runaway line without terminator; emit what we have
+                            if not skip_head:
+                                lines.append(partial)
+                            partial = b''
+                            skip_head = False
+
         except asyncio.TimeoutError:
             logger.warning(f"Timeout reading file {file_path}")
             return None
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
             return None
+
+        return {
+            'lines': [
+                line.decode('utf-8', errors='ignore').rstrip('\r')
+                for line in lines
+            ],
+            'position': pos,
+            'partial': partial,
+            'skipped': skipped,
+            'hasMore': has_more
+        }
     
-    async def get_file_size_safe(self, file_path: Path, timeout: float = 10.0) -> int:
-        """Get file size with timeout and error handling"""
+    async def read_range(
+        self,
+        filename: str,
+        start: int,
+        end: int,
+        skip: int = 0,
+        max_lines: int = 1000
+    ) -> Optional[List[str]]:
+        """Re-read lines already delivered from [start, end) of a log file
+
+        Used to replay history for resuming clients; the reader's cursor is
+        not touched. Skips the first skip lines. None on error. Ranges the
+        mirror already holds are read locally.
+        """
+        if self.mirror.mirrored(filename) >= end:
+            source = await self.mirror.source(self.smb_path / filename, self.io)
+            if source.mirrored >= end:
+                try:
+                    lines = await asyncio.to_thread(_read_source_lines, source, start, end)
+                    return lines[skip:skip + max_lines]
+                except OSError as e:
+                    logger.warning(f"Could not read mirror of {filename}: {e}")
+        chunk = await self.read_new_lines(
+            self.smb_path / filename, start, end, b'', skip + max_lines, max_bytes=max(end - start, 1)
+        )
+        if chunk is None:
+            return None
+        lines = chunk['lines']
+        if chunk['partial'].strip() and not chunk['hasMore']:
+            # The range ended with a line flushed at rotation
+            lines.append(chunk['partial'].decode('utf-8', errors='ignore').rstrip('\r'))
+        return lines[skip:skip + max_lines]
+    
+    async def open_line_index(self, log_file: Path):
+        """Switch the line index to log_file, resuming a valid sidecar"""
+        if self.line_index:
+            await asyncio.to_thread(self.line_index.save)
+
+        index = LineIndex(log_file)
+        try:
+            stat_result = await asyncio.wait_for(self.run_io(log_file.stat), timeout=10.0)
+            if not await asyncio.to_thread(index.load, stat_result.st_size, stat_result.st_mtime_ns):
+                index.reset()
+        except Exception as e:
+            logger.warning(f"Could not open line index for {log_file}: {e}")
+        self.line_index = index
+        try:
+            await self.mirror.open(log_file, self.io)
+        except Exception as e:
+            logger.warning(f"Could not open mirror for {log_file}: {e}")
+
+    def _feed_index(self, file_path: Path, offset: int, data: bytes):
+        """Pass bytes just read from the share on to the line index and the mirror"""
+        if self.line_index and self.line_index.log_file == file_path:
+            self.line_index.feed(offset, data)
+        self.mirror.feed(file_path.name, offset, data)
+
+    async def update_index(
+        self,
+        max_bytes: int = INDEX_CATCHUP_BYTES,
+        timeout: float = 30.0
+    ) -> bool:
+        """Index bytes the live tail skipped, up to max_bytes per call
+
+        Returns True once the index has caught up with the read cursor.
+        """
+        index = self.line_index
+        if not index or index.log_file != self.current_log_file:
+            return False
+
+        end_pos = min(self.last_size, index.scanned_bytes + max_bytes)
+        if index.scanned_bytes < end_pos:
+            try:
+                async with asyncio.timeout(timeout):
+                    async with aiofiles.open(index.log_file, 'rb', executor=self.io) as f:
+                        pos = index.scanned_bytes
+                        await f.seek(pos)
+                        while pos < end_pos:
+                            chunk = await f.read(min(READ_CHUNK_SIZE, end_pos - pos))
+                            if not chunk:
+                                break
+                            index.feed(pos, chunk)
+                            self.mirror.feed(index.log_file.name, pos, chunk)
+                            pos += len(chunk)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout indexing {index.log_file}")
+            except Exception as e:
+                logger.error(f"Error indexing {index.log_file}: {e}")
+
+        now = asyncio.get_running_loop().time()
+        if index.dirty and now - self._index_saved_at >= INDEX_SAVE_INTERVAL:
+            try:
+                await asyncio.to_thread(index.save)
+                self._index_saved_at = now
+            except Exception as e:
+                logger.warning(f"Could not save index for {index.log_file}: {e}")
+
+        return index.scanned_bytes >= self.last_size
+
+    @timed(FILE_STAT_SECONDS)
+    async def stat_file_safe(self, file_path: Path, timeout: float = 10.0) -> Optional[os.stat_result]:
+        """Stat a file with timeout and error handling"""
         try:
             async with asyncio.timeout(timeout):
-                stat_result = await asyncio.to_thread(file_path.stat)
-                return stat_result.st_size
+                return await self.run_io(file_path.stat)
         except asyncio.TimeoutError:
             logger.warning(f"Timeout getting file size for {file_path}")
-            return -1
+            return None
         except Exception as e:
             logger.error(f"Error getting file size for {file_path}: {e}")
-            return -1
+            return None
     
+    async def get_file_size_safe(self, file_path: Path, timeout: float = 10.0) -> int:
+        """Get file size with timeout and error handling"""
+        stat_result = await self.stat_file_safe(file_path, timeout)
+        return stat_result.st_size if stat_result else -1
+    
+    @timed(TAIL_READ_SECONDS)
     async def read_last_lines(
         self, 
         file_path: Path, 
         max_lines: int = 1000, 
-        timeout: float = 30.0
+        timeout: float = 30.0,
+        end: Optional[int] = None
     ) -> List[str]:
-        """Read last N lines from file efficiently"""
+        """Read last N lines from file efficiently, or the last N before offset end
+
+        Scans backwards in blocks that double from TAIL_BLOCK_MIN up to
+        TAIL_BLOCK_MAX, so every byte is read and searched once.
+        """
         try:
             async with asyncio.timeout(timeout):
-                async with aiofiles.open(file_path, 'rb') as f:
+                async with aiofiles.open(file_path, 'rb', executor=self.io) as f:
                     # Get file size
                     await f.seek(0, 2)  # Seek to end
                     file_size = await f.tell()
+                    if end is not None:
+                        file_size = min(file_size, end)
                     
-                    if file_size == 0:
+                    if file_size <= 0 or max_lines <= 0:
                         return []
                     
-                    # Read file backwards in chunks
-                    lines = []
-                    buffer = b''
-                    chunk_size = min(8192, file_size)
+                    lines: deque = deque()
+                    # Fragments of the line crossing the block boundary, newest first
+                    carry: List[bytes] = []
+                    block_size = TAIL_BLOCK_MIN
                     pos = file_size
                     
                     while pos > 0 and len(lines) < max_lines:
-                        # Calculate chunk size
-                        read_size = min(chunk_size, pos)
+                        read_size = min(block_size, pos)
                         pos -= read_size
+                        block_size = min(block_size * 2, TAIL_BLOCK_MAX)
                         
-                        # Read chunk
                         await f.seek(pos)
                         chunk = await f.read(read_size)
-                        buffer = chunk + buffer
-                        
-                        # Split into lines
-                        lines_in_chunk = buffer.split(b'\n')
-                        buffer = lines_in_chunk[0]  # Keep incomplete line
                         
-                        # Add complete lines (in reverse order)
-                        for line in reversed(lines_in_chunk[1:]):
+                        end = len(chunk)
+                        newline = chunk.rfind(b'\n', 0, end)
+                        while newline != -1:
+                            line = chunk[newline + 1:end]
+                            if carry:
+                                carry.append(line)
+                                line = b''.join(reversed(carry))
+                                carry = []
                             if line.strip():
-                                try:
-                                    decoded_line = line.decode('utf-8', errors='ignore').rstrip('\r')
-                                    lines.insert(0, decoded_line)
-                                    if len(lines) >= max_lines:
-                                        break
-                                except Exception:
-                                    continue
-                        
-                        if len(lines) >= max_lines:
-                            break
+                                lines.appendleft(line)
+                                if len(lines) >= max_lines:
+                                    break
+                            end = newline
+                            newline = chunk.rfind(b'\n', 0, end)
+                        else:
+                            carry.append(chunk[:end])
                     
-                    # Add remaining buffer if not empty
-                    if buffer.strip() and len(lines) < max_lines:
-                        try:
-                            decoded_line = buffer.decode('utf-8', errors='ignore').rstrip('\r')
-                            lines.insert(0, decoded_line)
-                        except Exception:
-                            pass
+                    # Start of file reached: the remainder is the first line
+                    if pos == 0 and carry and len(lines) < max_lines:
+                        line = b''.join(reversed(carry))
+                        if line.strip():
+                            lines.appendleft(line)
                     
-                    return lines[-max_lines:] if len(lines) > max_lines else lines
+                    if not lines:
+                        return []
+                    
+                    # Decode once and split back into lines
+                    text = b'\n'.join(lines).decode('utf-8', errors='ignore')
+                    return [line.rstrip('\r') for line in text.split('\n')]
                     
         except asyncio.TimeoutError:
             logger.warning(f"Timeout reading last lines from {file_path}")
@@ -171,12 +392,36 @@ class LogReader:
             logger.error(f"Error reading last lines from {file_path}: {e}")
             return []
     
-    async def read_logs(
-        self, 
-        last_size: int = 0, 
-        max_lines: int = 1000
-    ) -> Dict[str, Any]:
-        """Read logs with incremental updates"""
+    async def _read_partial_line(self, file_path: Path, size: int, timeout: float = 10.0) -> bytes:
+        """Bytes after the last newline before offset size; empty if the file ends in one"""
+        carry: List[bytes] = []
+        try:
+            async with asyncio.timeout(timeout):
+                async with aiofiles.open(file_path, 'rb', executor=self.io) as f:
+                    pos = size
+                    block_size = TAIL_BLOCK_MIN
+                    while pos > 0:
+                        read_size = min(block_size, pos)
+                        pos -= read_size
+                        block_size = min(block_size * 2, TAIL_BLOCK_MAX)
+                        await f.seek(pos)
+                        chunk = await f.read(read_size)
+                        newline = chunk.rfind(b'\n')
+                        if newline != -1:
+                            carry.append(chunk[newline + 1:])
+                            break
+                        carry.append(chunk)
+        except Exception as e:
+            logger.warning(f"Could not check end of {file_path}: {e}")
+            return b''
+        return b''.join(reversed(carry))
+    
+    async def read_logs(self, max_lines: int = 1000) -> Dict[str, Any]:
+        """Start tailing: load the last max_lines lines and put the cursor at EOF
+
+        Only the tail engine calls this; clients are served from its buffer
+        and never move the reader's cursor.
+        """
         try:
             # Get current log file
             log_file = await asyncio.wait_for(
@@ -193,6 +438,8 @@ class LogReader:
             
             # Update current file reference
             self.current_log_file = log_file
+            if self.line_index is None or self.line_index.log_file != log_file:
+                await self.open_line_index(log_file)
             
             # Get current file size
             current_size = await self.get_file_size_safe(log_file)
@@ -203,31 +450,15 @@ class LogReader:
                     'timestamp': datetime.now().isoformat()
                 }
             
-            new_lines = []
-            has_new_data = False
-            
-            if last_size == 0:
-                # First request - read last N lines
-                logger.info(f"Reading last {max_lines} lines from {log_file}")
-                new_lines = await self.read_last_lines(log_file, max_lines)
-                has_new_data = len(new_lines) > 0
-                
-            elif current_size > last_size:
-                # File has grown - read new content
-                logger.debug(f"File grown from {last_size} to {current_size} bytes")
-                new_content = await self.read_file_with_timeout(log_file, last_size)
-                
-                if new_content:
-                    new_lines = [
-                        line.rstrip('\r') 
-                        for line in new_content.split('\n') 
-                        if line.strip()
-                    ]
-                    has_new_data = len(new_lines) > 0
-                    
-                    # Limit lines to prevent memory issues
-                    if len(new_lines) > max_lines:
-                        new_lines = new_lines[-max_lines:]
+            logger.info(f"Reading last {max_lines} lines from {log_file}")
+            # The last line may still be written; carry it and show only complete lines
+            self.partial_line = await self._read_partial_line(log_file, current_size)
+            new_lines = await self.read_last_lines(
+                log_file, max_lines, end=current_size - len(self.partial_line)
+            )
+            has_new_data = len(new_lines) > 0
+            skipped = None
+            has_more = False
             
             # Update tracking
             self.last_size = current_size
@@ -235,16 +466,18 @@ class LogReader:
             
             # File stats
             file_stats = None
-            try:
-                stat_result = await asyncio.to_thread(log_file.stat)
+            stat_result = await self.stat_file_safe(log_file)
+            if stat_result is not None:
+                self.file_identity = (stat_result.st_dev, stat_result.st_ino) if stat_result.st_ino else None
+                self.last_mtime_ns = stat_result.st_mtime_ns
+                if self.line_index and self.line_index.log_file == log_file:
+                    self.line_index.file_mtime_ns = stat_result.st_mtime_ns
                 file_stats = {
                     'size': current_size,
                     'modified': datetime.fromtimestamp(stat_result.st_mtime).isoformat(),
                     'readable': True,
                     'fullPath': str(log_file)
                 }
-            except Exception as e:
-                logger.warning(f"Could not get file stats: {e}")
             
             return {
                 'success': True,
@@ -255,7 +488,12 @@ class LogReader:
                 'timestamp': datetime.now().isoformat(),
                 'totalLines': len(new_lines),
                 'selectedPath': str(self.smb_path),
-                'fileStats': file_stats
+                'fileStats': file_stats,
+                'skipped': skipped,
+                'hasMore': has_more,
+                # A reverse tail has no known first-line offset to replay from
+                'replayable': False,
+                'lineEnd': current_size - len(self.partial_line)
             }
             
         except asyncio.TimeoutError:
@@ -273,20 +511,150 @@ class LogReader:
                 'timestamp': datetime.now().isoformat()
             }
     
-    async def check_for_updates(self) -> Dict[str, Any]:
-        """Check for log file updates (for background monitoring)"""
+    async def check_for_updates(self, initial_lines: int = 100, max_lines: int = 500) -> Dict[str, Any]:
+        """Check for log file updates (for background monitoring)
+
+        Follows daily rotation and truncation: when a newer file appears the
+        current one is drained to EOF first, then tailing continues at
+        offset 0 of the new file, so every line is delivered exactly once.
+        """
         if not self.current_log_file:
-            return await self.read_logs(0, 100)  # Initial read with fewer lines
+            return await self.read_logs(initial_lines)  # Initial read
         
-        # Check if file has grown
-        current_size = await self.get_file_size_safe(self.current_log_file)
-        if current_size > self.last_size:
-            return await self.read_logs(self.last_size, 500)  # Read updates
+        try:
+            log_file = await asyncio.wait_for(self.get_current_log_file(), timeout=15.0)
+        except asyncio.TimeoutError:
+            log_file = None
+        
+        if log_file and log_file != self.current_log_file:
+            # Rotation: finish the old file before switching
+            result = await self._read_increment(self.current_log_file, max_lines, final=True)
+            drained = result.get('success') and not result.get('hasMore')
+            if not result.get('success') and await self._is_gone(self.current_log_file):
+                # The old file is gone, nothing left to drain
+                result = {'success': True, 'hasNewData': False, 'newLines': [], 'timestamp': datetime.now().isoformat()}
+                drained = True
+            if drained:
+                previous = self.current_log_file
+                await self._switch_log_file(log_file)
+                logger.info(f"Log rotated from {previous.name} to {log_file.name}")
+                result['rotatedTo'] = log_file.name
+                # Poll again right away to start on the new file
+                result['hasMore'] = True
+            return result
+        
+        return await self._read_increment(self.current_log_file, max_lines)
+    
+    async def _is_gone(self, file_path: Path, timeout: float = 10.0) -> bool:
+        """Whether file_path is known to be deleted; a slow or failing share counts as not gone"""
+        try:
+            return not await asyncio.wait_for(self.run_io(file_path.exists), timeout=timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            logger.warning(f"Could not check whether {file_path} still exists: {str(e) or 'timed out'}")
+            return False
+    
+    async def _switch_log_file(self, log_file: Path):
+        """Start tailing log_file from its first byte"""
+        self.current_log_file = log_file
+        self.last_size = 0
+        self.partial_line = b''
+        self.file_identity = None
+        self.last_mtime_ns = 0
+        await self.open_line_index(log_file)
+    
+    async def _read_increment(self, log_file: Path, max_lines: int, final: bool = False) -> Dict[str, Any]:
+        """Read what was appended to log_file since our cursor
+
+        A shrinking size, a new inode or an mtime that went backwards means
+        the file was truncated or replaced, so reading restarts at offset 0.
+        With final=True an unterminated last line is flushed as well.
+        """
+        stat_result = await self.stat_file_safe(log_file)
+        if stat_result is None:
+            return {
+                'success': False,
+                'error': f'Cannot access file {log_file}',
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        identity = (stat_result.st_dev, stat_result.st_ino) if stat_result.st_ino else None
+        replaced = (
+            stat_result.st_size < self.last_size
+            or (identity and self.file_identity and identity != self.file_identity)
+            or stat_result.st_mtime_ns < self.last_mtime_ns
+        )
+        if replaced:
+            logger.warning(f"{log_file.name} was truncated or replaced, restarting at offset 0")
+            self.last_size = 0
+            self.partial_line = b''
+            if self.line_index and self.line_index.log_file == log_file:
+                self.line_index.reset()
+            self.mirror.reset(log_file.name)
+        self.file_identity = identity
+        self.last_mtime_ns = stat_result.st_mtime_ns
+        
+        new_lines = []
+        skipped = None
+        has_more = False
+        bytes_read = 0
+        # Offset where the first returned line starts
+        line_start = self.last_size - len(self.partial_line)
+        if stat_result.st_size > self.last_size:
+            chunk = await self.read_new_lines(
+                log_file, self.last_size, stat_result.st_size, self.partial_line, max_lines
+            )
+            if chunk is None:
+                return {
+                    'success': False,
+                    'error': f'Timeout reading file {log_file}',
+                    'timestamp': datetime.now().isoformat()
+                }
+            new_lines = chunk['lines']
+            skipped = chunk['skipped']
+            has_more = chunk['hasMore']
+            bytes_read = chunk['position'] - (skipped['to'] if skipped else self.last_size)
+            self.last_size = chunk['position']
+            self.partial_line = chunk['partial']
+        
+        if final and not has_more and self.partial_line.strip():
+            new_lines.append(self.partial_line.decode('utf-8', errors='ignore').rstrip('\r'))
+            self.partial_line = b''
+        
+        if self.line_index and self.line_index.log_file == log_file:
+            self.line_index.file_mtime_ns = stat_result.st_mtime_ns
+        self.last_check = datetime.now()
         
         return {
             'success': True,
-            'hasNewData': False,
-            'newLines': [],
-            'size': current_size,
-            'timestamp': datetime.now().isoformat()
+            'filename': log_file.name,
+            'size': self.last_size,
+            'hasNewData': len(new_lines) > 0,
+            'newLines': new_lines,
+            'timestamp': datetime.now().isoformat(),
+            'totalLines': len(new_lines),
+            'selectedPath': str(self.smb_path),
+            'fileStats': {
+                'size': stat_result.st_size,
+                'modified': datetime.fromtimestamp(stat_result.st_mtime).isoformat(),
+                'readable': True,
+                'fullPath': str(log_file)
+            },
+            'skipped': skipped,
+            'hasMore': has_more,
+            'truncated': bool(replaced),
+            'bytesRead': bytes_read,
+            'replayable': skipped is None,
+            'lineStart': line_start,
+            'lineEnd': self.last_size - len(self.partial_line)
         }
+
+def _read_source_lines(source: MirrorSource, start: int, end: int) -> List[str]:
+    """Non-blank lines in [start, end) of a mirrored file"""
+    with source.open() as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return [
+        line.decode('utf-8', errors='ignore').rstrip('\r')
+        for line in data.split(b'\n')
+        if line.strip()
+    ]
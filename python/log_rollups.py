@@ -0,0 +1,349 @@
+"""
+Log Rollups for ACT Sentinel logs
+Per-minute record counts by level and component, kept incrementally
+"""
+
+import asyncio
+import json
+import logging
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from log_mirror import MirrorSource
+from log_reader import LogReader, READ_CHUNK_SIZE
+from log_records import LEVEL_NAMES, RecordBatch, component_id, component_name, parse_record
+
+logger = logging.getLogger(__name__)
+
+# Rollups of closed files are cached on local disk next to the indexes
+ROLLUP_DIR = Path('cache') / 'rollups'
+# Largest /api/stats response: a week of one-minute buckets
+STATS_MAX_BUCKETS = 7 * 24 * 60
+# Components beyond the busiest this many are summed into STATS_OTHER
+STATS_MAX_COMPONENTS = 20
+STATS_OTHER = '(other)'
+
+_MAGIC = b'ACTROL01'
+_HEADER = struct.Struct('<8sqqII')
+
+def _scan_counts(source: MirrorSource, start: int, end: int, final: bool) -> Dict[Tuple[int, int, int], int]:
+    """Count timestamped records in [start, end) of a file by (minute, level, component)
+
+    start must be a line boundary. With final, an unterminated last line is
+    counted too. Blocking; mirrored bytes are read locally.
+    """
+    counts: Dict[Tuple[int, int, int], int] = {}
+    pos = start
+    partial = b''
+    with source.open() as f:
+        f.seek(start)
+        while pos < end:
+            chunk = f.read(min(READ_CHUNK_SIZE, end - pos))
+            if not chunk:
+                break
+            pos += len(chunk)
+            lines = (partial + chunk if partial else chunk).split(b'\n')
+            partial = lines.pop()
+            for line in lines:
+                _count_line(line, counts)
+    if final and partial:
+        _count_line(partial, counts)
+    return counts
+
+def _count_line(line: bytes, counts: Dict[Tuple[int, int, int], int]):
+    timestamp, level_no, cid, _ = parse_record(line.decode('utf-8', errors='ignore'))
+    if timestamp >= 0:
+        key = (timestamp // 60000, level_no, cid)
+        counts[key] = counts.get(key, 0) + 1
+
+class FileRollup:
+    """Record counts per (minute, level, component) for one log file
+
+    While the file is today's, counts live in a dict that the tail engine
+    adds to as lines arrive. Once the file is closed they are frozen into
+    sorted columns, a few bytes per row, and cached on disk.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts: Optional[Dict[Tuple[int, int, int], int]] = {}
+        # Bytes of the file counted so far, from offset 0
+        self.scanned_bytes = 0
+        # Set while a scan runs off the loop, so live batches are not counted twice
+        self.busy = False
+        self.source_size = 0
+        self.source_mtime_ns = 0
+        self.minutes = array('q')
+        self.levels = array('b')
+        self.components = array('H')
+        self.values = array('I')
+
+    @property
+    def complete(self) -> bool:
+        return self.counts is None
+
+    def merge(self, counts: Dict[Tuple[int, int, int], int]):
+        for key, count in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def add_batch(self, batch: RecordBatch):
+        """Count the timestamped records of a batch the tail just read"""
+        counts = self.counts
+        for timestamp, level_no, cid in zip(batch.timestamps, batch.levels, batch.components):
+            if timestamp >= 0:
+                key = (timestamp // 60000, level_no, cid)
+                counts[key] = counts.get(key, 0) + 1
+
+    def freeze(self, size: int, mtime_ns: int):
+        """Switch to sorted columns once the whole file is counted"""
+        rows = sorted(self.counts.items())
+        self.minutes = array('q', (key[0] for key, _ in rows))
+        self.levels = array('b', (key[1] for key, _ in rows))
+        self.components = array('H', (key[2] for key, _ in rows))
+        self.values = array('I', (count for _, count in rows))
+        self.counts = None
+        self.scanned_bytes = self.source_size = size
+        self.source_mtime_ns = mtime_ns
+
+    def rows(self, first_minute: int, last_minute: int) -> Iterator[Tuple[int, int, int, int]]:
+        """(minute, level, component id, count) for minutes in [first_minute, last_minute]"""
+        if self.counts is not None:
+            for (minute, level_no, cid), count in list(self.counts.items()):
+                if first_minute <= minute <= last_minute:
+                    yield minute, level_no, cid, count
+            return
+        lo = bisect_left(self.minutes, first_minute)
+        hi = bisect_right(self.minutes, last_minute)
+        yield from zip(self.minutes[lo:hi], self.levels[lo:hi], self.components[lo:hi], self.values[lo:hi])
+
+    def save(self, path: Path):
+        """Write a frozen rollup atomically; component ids are stored as names"""
+        used = sorted(set(self.components))
+        names = json.dumps([component_name(cid) for cid in used]).encode('utf-8')
+        local_ids = {cid: i for i, cid in enumerate(used)}
+        header = _HEADER.pack(_MAGIC, self.source_size, self.source_mtime_ns, len(self.values), len(names))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(names)
+            f.write(self.minutes.tobytes())
+            f.write(self.levels.tobytes())
+            f.write(array('H', (local_ids[cid] for cid in self.components)).tobytes())
+            f.write(self.values.tobytes())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, name: str) -> Optional['FileRollup']:
+        """A frozen rollup from disk, or None if missing or unreadable"""
+        try:
+            data = path.read_bytes()
+            magic, size, mtime_ns, rows, names_len = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC:
+                return None
+            pos = _HEADER.size
+            names = json.loads(data[pos:pos + names_len])
+            pos += names_len
+            rollup = cls(name)
+            for column, itemsize in (('minutes', 8), ('levels', 1), ('components', 2), ('values', 4)):
+                getattr(rollup, column).frombytes(data[pos:pos + rows * itemsize])
+                pos += rows * itemsize
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable rollup {path}: {e}")
+            return None
+        if len(rollup.values) != rows:
+            return None
+        # Map the stored names to this process's interned ids
+        ids = [component_id(component) for component in names]
+        rollup.components = array('H', (ids[i] for i in rollup.components))
+        rollup.counts = None
+        rollup.scanned_bytes = rollup.source_size = size
+        rollup.source_mtime_ns = mtime_ns
+        return rollup
+
+class LogRollups:
+    """Per-minute counts for every log file, answering /api/stats
+
+    Today's file is counted as the tail engine reads it; bytes the tail
+    skipped (the initial window, gaps) are scanned on the next query.
+    Closed files are scanned once on demand and cached per file.
+    """
+
+    def __init__(self, log_reader: LogReader, rollup_dir: Path = ROLLUP_DIR):
+        self.log_reader = log_reader
+        self.directory = Path(rollup_dir)
+        self.files: Dict[str, FileRollup] = {}
+        self.scans = 0
+        self.scanned_bytes = 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def add_batch(self, file_id: Optional[str], batch: RecordBatch, line_start: Optional[int], line_end: int):
+        """Count lines the tail read from bytes [line_start, line_end) of file_id
+
+        Only batches that continue the counted prefix are taken; anything
+        else is left for the next on-demand scan.
+        """
+        if not file_id or line_start is None:
+            return
+        rollup = self.files.get(file_id)
+        if rollup is None:
+            if line_start != 0:
+                return
+            rollup = self.files[file_id] = FileRollup(file_id)
+        if rollup.complete or rollup.busy or rollup.scanned_bytes != line_start:
+            return
+        rollup.add_batch(batch)
+        rollup.scanned_bytes = line_end
+
+    def forget_file(self, file_id: str):
+        """Drop counts for a file that was truncated or replaced"""
+        self.files.pop(file_id, None)
+
+    async def _run(self, source: MirrorSource, func, *args):
+        if source.local:
+            return await asyncio.to_thread(func, *args)
+        return await self.log_reader.run_io(func, *args)
+
+    async def file_rollup(self, log_file: Path) -> FileRollup:
+        """Counts for a whole log file, scanning only what is not counted yet"""
+        name = log_file.name
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            reader = self.log_reader
+            rollup = self.files.get(name)
+            source = await reader.mirror.source(log_file, reader.io)
+
+            if reader.current_log_file is not None and name == reader.current_log_file.name:
+                if rollup is None or rollup.complete:
+                    rollup = self.files[name] = FileRollup(name)
+                # Count up to the tail's line cursor; the tail continues from there
+                await self._scan(rollup, source, reader.last_size - len(reader.partial_line), final=False)
+                return rollup
+
+            if source.local:
+                size, mtime_ns = source.size, source.mtime_ns
+            else:
+                stat_result = await reader.run_io(log_file.stat)
+                size, mtime_ns = stat_result.st_size, stat_result.st_mtime_ns
+            if rollup is not None and rollup.complete and (rollup.source_size, rollup.source_mtime_ns) == (size, mtime_ns):
+                return rollup
+
+            path = self.directory / f"{name}.rollup"
+            cached = await asyncio.to_thread(FileRollup.load, path, name)
+            if cached is not None and (cached.source_size, cached.source_mtime_ns) == (size, mtime_ns):
+                self.files[name] = cached
+                return cached
+
+            if rollup is None or rollup.complete or rollup.scanned_bytes > size:
+                rollup = FileRollup(name)
+            # Yesterday's live counts are finished rather than recounted
+            await self._scan(rollup, source, size, final=True)
+            rollup.freeze(size, mtime_ns)
+            self.files[name] = rollup
+            try:
+                await asyncio.to_thread(rollup.save, path)
+            except OSError as e:
+                logger.warning(f"Could not save rollup for {name}: {e}")
+            return rollup
+
+    async def _scan(self, rollup: FileRollup, source: MirrorSource, end: int, final: bool):
+        start = rollup.scanned_bytes
+        if start >= end and not final:
+            return
+        rollup.busy = True
+        try:
+            counts = await self._run(source, _scan_counts, source, start, end, final)
+        finally:
+            rollup.busy = False
+        rollup.merge(counts)
+        rollup.scanned_bytes = max(end, start)
+        self.scans += 1
+        self.scanned_bytes += max(end - start, 0)
+
+    async def query(
+        self,
+        start: datetime,
+        end: datetime,
+        step: int = 60,
+        timeout: float = 60.0
+    ) -> Dict[str, Any]:
+        """Counts in [start, end) as arrays of step-second buckets
+
+        Files counted before a timeout keep their rollups, so a retry
+        carries on where this one stopped.
+        """
+        if step < 60 or step % 60:
+            raise ValueError("step must be a positive multiple of 60 seconds")
+        if end <= start:
+            raise ValueError("'to' must be after 'from'")
+        step_ms = step * 1000
+        start_ms = int(start.timestamp()) // 60 * 60000
+        end_ms = int(end.timestamp() * 1000)
+        buckets = -(-(end_ms - start_ms) // step_ms)
+        if buckets > STATS_MAX_BUCKETS:
+            raise ValueError(f"Too many buckets ({buckets}), use a larger step or a shorter range")
+
+        totals = [0] * buckets
+        levels: Dict[int, List[int]] = {}
+        components: Dict[int, List[int]] = {}
+        first_minute = start_ms // 60000
+        last_minute = (end_ms - 1) // 60000
+
+        # A day's file can hold the first lines after midnight, so start a day early
+        files = await self.log_reader.list_log_files(start.date() - timedelta(days=1), end.date())
+        async with asyncio.timeout(timeout):
+            for log_file in files:
+                rollup = await self.file_rollup(log_file)
+                for minute, level_no, cid, count in rollup.rows(first_minute, last_minute):
+                    bucket = (minute * 60000 - start_ms) // step_ms
+                    totals[bucket] += count
+                    series = levels.get(level_no)
+                    if series is None:
+                        series = levels[level_no] = [0] * buckets
+                    series[bucket] += count
+                    if cid:
+                        series = components.get(cid)
+                        if series is None:
+                            series = components[cid] = [0] * buckets
+                        series[bucket] += count
+
+        return {
+            'success': True,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'step': step,
+            'start': start_ms,
+            'buckets': buckets,
+            'total': totals,
+            'levels': {
+                LEVEL_NAMES[level_no] if level_no >= 0 else 'UNKNOWN': series
+                for level_no, series in sorted(levels.items())
+            },
+            'components': self._top_components(components, buckets),
+            'files': [f.name for f in files],
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def _top_components(self, components: Dict[int, List[int]], buckets: int) -> Dict[str, List[int]]:
+        ranked = sorted(components.items(), key=lambda item: sum(item[1]), reverse=True)
+        result = {component_name(cid): series for cid, series in ranked[:STATS_MAX_COMPONENTS]}
+        if len(ranked) > STATS_MAX_COMPONENTS:
+            other = [0] * buckets
+            for _, series in ranked[STATS_MAX_COMPONENTS:]:
+                other = [a + b for a, b in zip(other, series)]
+            result[STATS_OTHER] = other
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'files': len(self.files),
+            'closed': sum(1 for r in self.files.values() if r.complete),
+            'scans': self.scans,
+            'scannedBytes': self.scanned_bytes
+        }
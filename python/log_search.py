@@ -0,0 +1,484 @@
+"""
+Log Search for ACT Sentinel logs
+Server-side streaming search over log files in large binary chunks
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Pattern, Tuple
+
+from log_mirror import MirrorSource
+from log_reader import LogReader
+from text_index import LogTextIndex
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_CONTEXT_LINES = 20
+MAX_SEARCH_RESULTS = 10000
+
+# Files larger than this are split into several ranges for the pool
+SEARCH_RANGE_BYTES = 64 * 1024 * 1024
+CONTEXT_LOOKBACK_BYTES = 64 * 1024
+CANCEL_SLOTS = 64
+
+SEARCH_MODES = ('text', 'regex', 'any')
+
+class SearchQuery:
+    """Compiled search: plain substring, regex, or OR of several keywords
+
+    'any' compiles every keyword into one alternation pattern so each
+    chunk is scanned once no matter how many keywords are given.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        mode: str = 'text',
+        ignore_case: bool = True,
+        context: int = 0
+    ):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {', '.join(SEARCH_MODES)}")
+        if not pattern:
+            raise ValueError("Empty search pattern")
+
+        self.pattern = pattern
+        self.mode = mode
+        self.ignore_case = ignore_case
+        self.context = max(0, min(context, MAX_CONTEXT_LINES))
+        self._needle: Optional[bytes] = None
+        self._regex: Optional[Pattern[bytes]] = None
+        # Literal alternatives a matching line must contain; None for regexes
+        self.keywords: Optional[List[str]] = None
+
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        if mode == 'text':
+            needle = pattern.encode('utf-8')
+            self._needle = needle.lower() if ignore_case else needle
+            self.keywords = [pattern]
+        elif mode == 'regex':
+            try:
+                self._regex = re.compile(pattern.encode('utf-8'), flags)
+            except re.error as e:
+                raise ValueError(f"Invalid regex: {e}")
+        else:
+            keywords = [k.strip() for k in pattern.split(',') if k.strip()]
+            if not keywords:
+                raise ValueError("No keywords given")
+            # Longest first so overlapping keywords prefer the longer match
+            keywords.sort(key=len, reverse=True)
+            self.keywords = keywords
+            alternation = b'|'.join(re.escape(k.encode('utf-8')) for k in keywords)
+            self._regex = re.compile(alternation, flags)
+
+    def finder(self, buffer: bytes) -> Callable[[int], int]:
+        """Return a function giving the next match position at or after pos, or -1"""
+        if self._needle is not None:
+            haystack = buffer.lower() if self.ignore_case else buffer
+            needle = self._needle
+            return lambda pos: haystack.find(needle, pos)
+
+        regex = self._regex
+
+        def find(pos: int) -> int:
+            match = regex.search(buffer, pos)
+            return match.start() if match else -1
+
+        return find
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pattern': self.pattern,
+            'mode': self.mode,
+            'ignoreCase': self.ignore_case,
+            'context': self.context
+        }
+
+def _back_lines(buffer: bytes, line_start: int, count: int) -> int:
+    """Start offset of the line `count` lines before the one at line_start"""
+    pos = line_start
+    for _ in range(count):
+        if pos == 0:
+            break
+        pos = buffer.rfind(b'\n', 0, pos - 1) + 1
+    return pos
+
+def _forward_lines(buffer: bytes, line_end: int, count: int) -> int:
+    """End offset (newline position) `count` lines after the line ending at line_end"""
+    pos = line_end
+    for _ in range(count):
+        following = buffer.find(b'\n', pos + 1)
+        if following == -1:
+            break
+        pos = following
+    return pos
+
+def _decode_lines(data: bytes) -> List[str]:
+    if not data:
+        return []
+    return [
+        line.rstrip('\r')
+        for line in data.decode('utf-8', errors='ignore').split('\n')
+    ]
+
+def scan_file(
+    source: MirrorSource,
+    query: SearchQuery,
+    emit: Callable[[Dict[str, Any]], None],
+    cancel: Any,
+    max_results: int = MAX_SEARCH_RESULTS,
+    start: int = 0,
+    end: Optional[int] = None,
+    first_line: int = 1
+) -> Dict[str, Any]:
+    """Scan [start, end) of a file and emit every matching line with context
+
+    start must be a line boundary; the line containing end is scanned
+    to completion. cancel only needs an is_set() method. Mirrored bytes are
+    read locally. Blocking, so run it off the event loop.
+    """
+    context = query.context
+    results = 0
+    scanned = 0
+    line_count = None
+    # Line number of the first line held in the buffer
+    base_line = first_line
+    carry = b''
+    # Lines at the head of the buffer kept only as leading context
+    report_from = 0
+
+    with source.open() as f:
+        if start > 0 and context:
+            # Leading context for the first lines of a range
+            lead_start = max(0, start - CONTEXT_LOOKBACK_BYTES)
+            f.seek(lead_start)
+            lead = f.read(start - lead_start)
+            carry = lead[_back_lines(lead, len(lead), context):]
+            report_from = len(carry)
+            base_line -= carry.count(b'\n')
+
+        f.seek(start)
+        pos = start
+        eof = False
+
+        while not eof and not cancel.is_set() and results < max_results:
+            read_size = SEARCH_CHUNK_SIZE
+            if end is not None and pos < end:
+                read_size = min(read_size, end - pos)
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            pos += len(chunk)
+            scanned += len(chunk)
+
+            buffer = carry + chunk
+            buffer_start = pos - len(buffer)
+            if eof:
+                if buffer and not buffer.endswith(b'\n'):
+                    buffer += b'\n'
+                report_to = len(buffer)
+            elif end is not None and pos >= end:
+                # Finish the line that straddles the range end, then stop
+                if not buffer.endswith(b'\n'):
+                    tail = f.readline()
+                    pos += len(tail)
+                    scanned += len(tail)
+                    buffer += tail
+                if not buffer.endswith(b'\n'):
+                    buffer += b'\n'
+                report_to = len(buffer)
+                # Trailing context comes from the next range but is not reported
+                for _ in range(context):
+                    following = f.readline()
+                    if not following:
+                        break
+                    buffer += following if following.endswith(b'\n') else following + b'\n'
+                eof = True
+            else:
+                last_newline = buffer.rfind(b'\n')
+                if last_newline == -1:
+                    carry = buffer
+                    continue
+                complete_end = last_newline + 1
+                # Hold back trailing lines whose after-context is not read yet
+                report_to = _back_lines(buffer, complete_end, context) if context else complete_end
+                report_to = max(report_to, report_from)
+
+            find = query.finder(buffer)
+            line_number = base_line
+            counted_to = 0
+            hit = find(report_from)
+            while hit != -1 and hit < report_to:
+                line_start = buffer.rfind(b'\n', 0, hit) + 1
+                line_end = buffer.find(b'\n', hit)
+                line_number += buffer.count(b'\n', counted_to, line_start)
+                counted_to = line_start
+
+                before_start = _back_lines(buffer, line_start, context)
+                after_end = _forward_lines(buffer, line_end, context)
+                line = buffer[line_start:line_end]
+                emit({
+                    'file': source.name,
+                    'offset': buffer_start + line_start,
+                    'lineNumber': line_number,
+                    'line': line.decode('utf-8', errors='ignore').rstrip('\r'),
+                    'before': _decode_lines(buffer[before_start:max(line_start - 1, before_start)]),
+                    'after': _decode_lines(buffer[line_end + 1:after_end])
+                })
+                results += 1
+                if results >= max_results or cancel.is_set():
+                    break
+                hit = find(line_end + 1)
+
+            if eof:
+                if results < max_results and not cancel.is_set():
+                    line_count = base_line + buffer.count(b'\n', 0, report_to) - first_line
+                break
+
+            # Keep the held-back lines plus their leading context for the next chunk
+            keep_from = _back_lines(buffer, report_to, context)
+            base_line += buffer.count(b'\n', 0, keep_from)
+            carry = buffer[keep_from:]
+            report_from = report_to - keep_from
+
+    return {
+        'file': source.name,
+        'start': start,
+        'results': results,
+        'bytesScanned': scanned,
+        'lineCount': line_count,
+        'cancelled': cancel.is_set()
+    }
+
+def plan_ranges(
+    sources: List[MirrorSource],
+    range_bytes: int = SEARCH_RANGE_BYTES
+) -> List[Tuple[MirrorSource, int, int]]:
+    """Split files into (source, start, end) ranges aligned to line starts"""
+    ranges = []
+    for source in sources:
+        try:
+            size = source.size if source.local else os.stat(source.path).st_size
+        except OSError as e:
+            logger.warning(f"Skipping {source.path} in search: {e}")
+            continue
+
+        starts = [0]
+        with source.open() as f:
+            for split in range(range_bytes, size, range_bytes):
+                # Move each split point to the start of the next line
+                f.seek(split - 1)
+                probe = f.readline()
+                aligned = split - 1 + len(probe)
+                if starts[-1] < aligned < size:
+                    starts.append(aligned)
+
+        ends = starts[1:] + [size]
+        ranges.extend((source, s, e) for s, e in zip(starts, ends))
+    return ranges
+
+# Per-search cancel flags shared with pool workers (set up by the initializer)
+_cancel_flags = None
+
+def _init_search_worker(cancel_flags):
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+class _SharedCancel:
+    """Cancel token backed by a slot in the pool-wide shared flag array"""
+
+    def __init__(self, slot: int):
+        self.slot = slot
+
+    def is_set(self) -> bool:
+        return bool(_cancel_flags[self.slot])
+
+def search_range(
+    source: MirrorSource,
+    query: SearchQuery,
+    start: int,
+    end: Optional[int],
+    max_results: int,
+    slot: int,
+    first_line: int = 1
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Pool worker: scan one byte range and return its matches"""
+    matches: List[Dict[str, Any]] = []
+    summary = scan_file(source, query, matches.append, _SharedCancel(slot), max_results, start, end, first_line)
+    return matches, summary
+
+class LogSearch:
+    """Fans searches out per file and byte range across a process pool"""
+
+    def __init__(self, log_reader: LogReader, workers: Optional[int] = None):
+        self.log_reader = log_reader
+        self.text_index = LogTextIndex(log_reader.mirror)
+        self.workers = workers or os.cpu_count() or 1
+        self.active: Dict[str, int] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cancel_flags = None
+        self._free_slots = list(range(CANCEL_SLOTS))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use"""
+        if self._executor is None:
+            context = multiprocessing.get_context('spawn')
+            self._cancel_flags = context.Array('b', CANCEL_SLOTS, lock=False)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_search_worker,
+                initargs=(self._cancel_flags,)
+            )
+            logger.info(f"Started search pool with {self.workers} workers")
+        return self._executor
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.text_index.shutdown()
+
+    def cancel(self, search_id: str) -> bool:
+        """Signal a running search to stop"""
+        slot = self.active.get(search_id)
+        if slot is None:
+            return False
+        self._cancel_flags[slot] = 1
+        return True
+
+    async def resolve_files(
+        self,
+        names: Optional[List[str]] = None,
+        first: Optional[date] = None,
+        last: Optional[date] = None
+    ) -> List[Path]:
+        """Pick the files to search: named files, a date range, or the current file"""
+        if names:
+            available = {p.name: p for p in await self.log_reader.list_log_files()}
+            missing = [n for n in names if n not in available]
+            if missing:
+                raise ValueError(f"Unknown log files: {', '.join(missing)}")
+            return sorted((available[n] for n in names), key=lambda p: p.name)
+
+        if first or last:
+            return await self.log_reader.list_log_files(first, last)
+
+        current = self.log_reader.current_log_file or await self.log_reader.get_current_log_file()
+        return [current] if current else []
+
+    async def search(
+        self,
+        query: SearchQuery,
+        files: List[Path],
+        max_results: int = MAX_SEARCH_RESULTS,
+        search_id: Optional[str] = None
+    ):
+        """Run a search on the pool, yielding messages as ranges complete
+
+        Files the trigram index covers are narrowed to the blocks that can
+        match; the rest are scanned in full. Ranges are released in
+        file-date and offset order, which is timestamp order for daily
+        logs, so the stream is already merged.
+        Once max_results matches are out, queued ranges are cancelled and
+        running ones are told to stop through the shared flag.
+        """
+        if not self._free_slots:
+            raise RuntimeError("Too many concurrent searches")
+
+        search_id = search_id or uuid.uuid4().hex
+        executor = self._get_executor()
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+        self.active[search_id] = slot
+        futures = []
+
+        try:
+            sources = [await self.log_reader.mirror.source(f, self.log_reader.io) for f in files]
+            plans = await asyncio.to_thread(self.text_index.plan, query.keywords, sources)
+            full_scans: Dict[str, List[Tuple[MirrorSource, int, int]]] = {}
+            for source, start, end in await self.log_reader.run_io(
+                plan_ranges, [s for s in sources if s.name not in plans]
+            ):
+                full_scans.setdefault(source.name, []).append((source, start, end))
+
+            # (source, start, end, first line); None continues the file's running line count
+            ranges: List[Tuple[MirrorSource, int, Optional[int], Optional[int]]] = []
+            for source in sources:
+                if source.name in plans:
+                    ranges.extend((source, start, end, first_line) for start, end, first_line in plans[source.name])
+                else:
+                    ranges.extend((s, start, end, None) for s, start, end in full_scans.get(source.name, ()))
+            yield {
+                'type': 'start',
+                'searchId': search_id,
+                'query': query.to_dict(),
+                'files': [f.name for f in files],
+                'indexedFiles': len(plans),
+                'ranges': len(ranges)
+            }
+
+            futures = [
+                asyncio.wrap_future(executor.submit(
+                    search_range, source, query, start, end, max_results, slot, first_line or 1
+                ))
+                for source, start, end, first_line in ranges
+            ]
+
+            results = 0
+            scanned = 0
+            # Running line count per file from the ranges released so far
+            lines_before: Dict[str, Optional[int]] = {}
+            for (_, _, _, first_line), future in zip(ranges, futures):
+                if results >= max_results or self._cancel_flags[slot]:
+                    break
+                matches, summary = await future
+                scanned += summary['bytesScanned']
+
+                if first_line is not None:
+                    # Index ranges carry absolute line numbers already
+                    for match in matches[:max_results - results]:
+                        yield {'type': 'match', **match}
+                        results += 1
+                    continue
+
+                offset_lines = lines_before.get(summary['file'], 0)
+                for match in matches[:max_results - results]:
+                    if offset_lines is None:
+                        match['lineNumber'] = None
+                    else:
+                        match['lineNumber'] += offset_lines
+                    yield {'type': 'match', **match}
+                    results += 1
+
+                if offset_lines is not None and summary['lineCount'] is not None:
+                    lines_before[summary['file']] = offset_lines + summary['lineCount']
+                else:
+                    lines_before[summary['file']] = None
+
+            yield {
+                'type': 'done',
+                'searchId': search_id,
+                'results': results,
+                'bytesScanned': scanned,
+                'cancelled': bool(self._cancel_flags[slot]),
+                'limitReached': results >= max_results
+            }
+        finally:
+            # Stop outstanding workers: drop queued ranges, flag running ones
+            self._cancel_flags[slot] = 1
+            for future in futures:
+                future.cancel()
+            if futures:
+                await asyncio.gather(*futures, return_exceptions=True)
+            self.active.pop(search_id, None)
+            self._free_slots.append(slot)
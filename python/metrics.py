@@ -0,0 +1,229 @@
+"""
+Metrics for ACT Sentinel log monitor
+Counters, gauges and histograms rendered in the Prometheus text format
+"""
+
+import functools
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+# Seconds; SMB calls range from sub-millisecond cache hits to multi-second stalls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (0, 1024, 8192, 65536, 262144, 1048576, 4194304, 8388608, 33554432)
+LINES_BUCKETS = (0, 1, 10, 100, 500, 1000, 5000, 10000)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Base for a metric family with optional labels
+
+    Updates are plain attribute arithmetic on the event loop thread, so
+    recording costs well under a microsecond.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], 'Metric'] = {}
+
+    def labels(self, *values) -> 'Metric':
+        """Child metric for one combination of label values"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> 'Metric':
+        return type(self)(self.name, self.documentation)
+
+    def _series(self) -> Iterable[Tuple[Tuple[str, ...], 'Metric']]:
+        if self.labelnames:
+            return sorted(self._children.items())
+        return [((), self)]
+
+    def samples_for(self, name: str, labelnames: Tuple[str, ...], values: Tuple[str, ...]) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, metric in self._series():
+            lines.extend(metric.samples_for(self.name, self.labelnames, values))
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def samples_for(self, name: str, labelnames, values) -> List[str]:
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+class Gauge(Metric):
+    """Gauge set directly, or read from a callback at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Any]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0
+        self.callback = callback
+
+    def set(self, value: float):
+        self.value = value
+
+    def _series(self):
+        if self.callback and self.labelnames:
+            # Callback returns {label values tuple: number}
+            return [(tuple(str(v) for v in key), value) for key, value in sorted(self.callback().items())]
+        if self.callback:
+            return [((), self.callback())]
+        return [(values, metric.value) for values, metric in super()._series()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self._series():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per-bucket (not cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> '_Timer':
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def samples_for(self, name: str, labelnames, values) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            labels = _format_labels(labelnames, values, f'le="{_format_value(float(bound))}"')
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{labels} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{labels} {self.count}")
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+def timed(histogram: Histogram):
+    """Decorator observing how long each await of a coroutine function takes"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = (), callback=None) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, callback))
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+# Hot-path metrics, recorded by the modules that own each path
+FILE_STAT_SECONDS = histogram('act_file_stat_seconds', 'Duration of log file stat calls on the share')
+FILE_READ_SECONDS = histogram('act_file_read_seconds', 'Duration of incremental log file reads')
+TAIL_READ_SECONDS = histogram('act_tail_read_seconds', 'Duration of reverse tail reads (read_last_lines)')
+PATH_PROBE_SECONDS = histogram('act_path_probe_seconds', 'Duration of SMB path probes', ['path'])
+POLL_SECONDS = histogram('act_poll_seconds', 'Duration of one tail engine poll of the share')
+POLL_BYTES = histogram('act_poll_bytes', 'Bytes read from the log file per poll', buckets=BYTES_BUCKETS)
+POLL_LINES = histogram('act_poll_lines', 'Lines appended to the buffer per poll', buckets=LINES_BUCKETS)
+READ_ERRORS = counter('act_read_errors_total', 'Polls that failed to read the log file')
+BROADCAST_SECONDS = histogram('act_broadcast_seconds', 'Time to filter, encode and enqueue one batch for every WebSocket client')
+SERIALIZE_SECONDS = histogram('act_serialize_seconds', 'Time to encode and compress one /api/logs body')
+LINES_DELIVERED = counter('act_lines_delivered_total', 'Log lines handed to clients', ['channel'])
+MIRROR_BYTES = counter('act_mirror_bytes_total', 'Bytes written to the local log mirror', ['source'])
+RESPONSE_CACHE_HITS = counter('act_response_cache_hits_total', '/api/logs bodies served from the response cache')
+
+# Gauges read at scrape time; their owners install the callbacks
+WEBSOCKET_CLIENTS = gauge('act_websocket_clients', 'Connected WebSocket clients')
+WEBSOCKET_QUEUED = gauge('act_websocket_queued_messages', 'Messages waiting in WebSocket client queues')
+SHARE_IO_QUEUE_DEPTH = gauge('act_share_io_queue_depth', 'Calls waiting for a share I/O thread', ['path'])
+SHARE_IO_IN_FLIGHT = gauge('act_share_io_in_flight', 'Calls running on share I/O threads', ['path'])
@@ -0,0 +1,289 @@
+"""
+Path Health Monitor for ACT Sentinel log shares
+Probes candidate SMB paths in the background and serves cached results
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from smb_detector import SMBPathDetector
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background probe rounds
+PATH_REFRESH_INTERVAL = 60.0
+# Results older than this are reported as stale
+PATH_RESULT_TTL = 180.0
+PATH_PROBE_TIMEOUT = 10.0
+# Minimum spacing of failure-triggered re-probes
+PATH_REPROBE_MIN_INTERVAL = 5.0
+# Longest wait before re-probing a path that keeps timing out
+PATH_BACKOFF_MAX = 600.0
+
+# Fail over after this many consecutive read errors on the active path
+FAILOVER_CONSECUTIVE_ERRORS = 3
+# ... or when its smoothed read latency exceeds this (seconds)
+FAILOVER_LATENCY = 10.0
+# Healthy probes the preferred path needs before we fail back to it
+FAILBACK_HEALTHY_PROBES = 2
+LATENCY_EWMA_ALPHA = 0.2
+READ_ERROR_WINDOW = 50
+
+def probe_healthy(result: Optional[Dict[str, Any]]) -> bool:
+    """Whether a probe result shows a readable path holding log files"""
+    return bool(
+        result and result.get('exists') and result.get('readable')
+        and not result.get('error') and result.get('log_files_count', 0) > 0
+    )
+
+class PathStats:
+    """Read outcomes and latency observed on one path"""
+
+    def __init__(self):
+        self.reads = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.latency: Optional[float] = None
+        self.recent = deque(maxlen=READ_ERROR_WINDOW)
+
+    def record(self, ok: bool, elapsed: float):
+        self.reads += 1
+        self.recent.append(ok)
+        if ok:
+            self.consecutive_errors = 0
+        else:
+            self.errors += 1
+            self.consecutive_errors += 1
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (elapsed - self.latency)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.recent:
+            return 0.0
+        return 1 - sum(self.recent) / len(self.recent)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'reads': self.reads,
+            'errors': self.errors,
+            'consecutiveErrors': self.consecutive_errors,
+            'errorRate': round(self.error_rate, 3),
+            'latency': round(self.latency, 4) if self.latency is not None else None
+        }
+
+class PathHealthMonitor:
+    """Background SMB path probing with a cached snapshot
+
+    One probe round runs at a time. Paths whose probe timed out are retried
+    with exponential backoff so a hung mount cannot pile up blocked threads;
+    the active path is probed every round.
+    """
+
+    def __init__(
+        self,
+        detector: Optional[SMBPathDetector] = None,
+        refresh_interval: float = PATH_REFRESH_INTERVAL,
+        ttl: float = PATH_RESULT_TTL,
+        timeout: float = PATH_PROBE_TIMEOUT
+    ):
+        self.detector = detector or SMBPathDetector()
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.timeout = timeout
+        self.active_path: Optional[str] = None
+        # First path the reader was started on; we fail back to it when it recovers
+        self.preferred_path: Optional[str] = None
+        self.stats: Dict[str, PathStats] = {}
+        self._healthy_streak: Dict[str, int] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
+        self.last_refresh: Optional[datetime] = None
+        self._next_probe: Dict[str, float] = {}
+        self._backoff: Dict[str, float] = {}
+        self._last_reprobe = 0.0
+        self._round: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background probe loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in (self._task, self._round):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Path health refresh failed: {e}")
+
+            try:
+                async with asyncio.timeout(self.refresh_interval):
+                    await self._wake.wait()
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def refresh(self, force: bool = False) -> List[Dict[str, Any]]:
+        """Probe the paths that are due; concurrent callers share one round"""
+        if self._round is None or self._round.done():
+            self._round = asyncio.create_task(self._probe_round(force))
+        await asyncio.shield(self._round)
+        return self.snapshot()
+
+    async def _probe_round(self, force: bool):
+        now = time.monotonic()
+        paths = [
+            path for path in self.detector.get_possible_paths()
+            if force or path == self.active_path or self._next_probe.get(path, 0.0) <= now
+        ]
+        if not paths:
+            return
+
+        results = await asyncio.gather(
+            *(self.detector.test_path_access(path, self.timeout) for path in paths),
+            return_exceptions=True
+        )
+
+        now = time.monotonic()
+        for path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                result = {'path': path, 'exists': False, 'readable': False, 'error': str(result)}
+            self.results[path] = result
+            self.checked_at[path] = now
+            self._healthy_streak[path] = self._healthy_streak.get(path, 0) + 1 if probe_healthy(result) else 0
+
+            if (result.get('error') or '').startswith('Timeout'):
+                backoff = min(self._backoff.get(path, self.refresh_interval / 2) * 2, PATH_BACKOFF_MAX)
+                self._backoff[path] = backoff
+                self._next_probe[path] = now + backoff
+                logger.warning(f"Probe of {path} timed out, next attempt in {backoff:.0f}s")
+            else:
+                self._backoff.pop(path, None)
+                self._next_probe[path] = now + self.refresh_interval
+
+        self.last_refresh = datetime.now()
+
+    def report_failure(self, path: Optional[str]):
+        """The reader hit an error on path; re-probe it now if it is the active one"""
+        if not path or path != self.active_path:
+            return
+        self.failures[path] = self.failures.get(path, 0) + 1
+        now = time.monotonic()
+        if now - self._last_reprobe < PATH_REPROBE_MIN_INTERVAL:
+            return
+        self._last_reprobe = now
+        self._next_probe[path] = 0.0
+        self._wake.set()
+
+    def set_active(self, path: str):
+        """Record that the reader now uses path"""
+        if self.preferred_path is None:
+            self.preferred_path = path
+        if self.active_path and self.active_path != path:
+            # The path we leave must prove itself again before fail-back
+            self._healthy_streak[self.active_path] = 0
+        self.active_path = path
+        stats = self.stats.setdefault(path, PathStats())
+        stats.consecutive_errors = 0
+        stats.latency = None
+
+    def record_read(self, path: Optional[str], ok: bool, elapsed: float):
+        """Account one read from path"""
+        if path:
+            self.stats.setdefault(path, PathStats()).record(ok, elapsed)
+
+    def needs_failover(self) -> bool:
+        """Whether the active path is failing badly enough to leave it"""
+        stats = self.stats.get(self.active_path)
+        if not stats:
+            return False
+        if stats.consecutive_errors >= FAILOVER_CONSECUTIVE_ERRORS:
+            return True
+        if stats.consecutive_errors and self.active_path in self.results \
+                and not probe_healthy(self.results[self.active_path]):
+            # Reads fail and the re-probe agrees: no point in retrying
+            return True
+        return stats.latency is not None and stats.reads >= 3 and stats.latency > FAILOVER_LATENCY
+
+    def failback_due(self) -> bool:
+        """Whether the preferred path has recovered while we use another"""
+        return (
+            self.preferred_path is not None
+            and self.active_path != self.preferred_path
+            and self._healthy_streak.get(self.preferred_path, 0) >= FAILBACK_HEALTHY_PROBES
+        )
+
+    def _healthy_candidates(self) -> List[Dict[str, Any]]:
+        return [
+            result for path, result in self.results.items()
+            if path != self.active_path and probe_healthy(result)
+            and (path not in self.stats or self.stats[path].consecutive_errors == 0)
+        ]
+
+    async def failover_target(self) -> Optional[str]:
+        """Best healthy path other than the active one"""
+        candidates = self._healthy_candidates()
+        if not candidates:
+            await self.refresh()
+            candidates = self._healthy_candidates()
+        if not candidates:
+            return None
+        if any(r['path'] == self.preferred_path for r in candidates):
+            return self.preferred_path
+        return min(candidates, key=lambda r: r.get('response_time') or float('inf'))['path']
+
+    def is_fresh(self) -> bool:
+        """Whether every cached result is within the TTL"""
+        if not self.results:
+            return False
+        now = time.monotonic()
+        return all(now - checked <= self.ttl for checked in self.checked_at.values())
+
+    async def best_path(self) -> Optional[str]:
+        """Preferred accessible path, probing first if the cache is cold, stale or has none"""
+        best = SMBPathDetector.select_best_path(list(self.results.values())) if self.is_fresh() else None
+        if best is None:
+            await self.refresh(force=True)
+            best = SMBPathDetector.select_best_path(list(self.results.values()))
+        return best
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Cached probe results with their age, in candidate order"""
+        now = time.monotonic()
+        snapshot = []
+        for path in self.detector.get_possible_paths():
+            if path not in self.results:
+                snapshot.append({'path': path, 'exists': None, 'pending': True})
+                continue
+            age = now - self.checked_at[path]
+            entry = dict(self.results[path])
+            entry['age'] = round(age, 1)
+            entry['stale'] = age > self.ttl
+            entry['active'] = path == self.active_path
+            entry['preferred'] = path == self.preferred_path
+            entry['failures'] = self.failures.get(path, 0)
+            if path in self.stats:
+                entry['readStats'] = self.stats[path].to_dict()
+            snapshot.append(entry)
+        return snapshot
@@ -0,0 +1,200 @@
+"""
+Share I/O Executors for ACT Sentinel log shares
+Bounded thread pool and circuit breaker per share path
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from metrics import SHARE_IO_IN_FLIGHT, SHARE_IO_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+SHARE_IO_WORKERS = 4
+# A call running longer than this counts as stuck (seconds)
+STUCK_CALL_AFTER = 15.0
+# Open the breaker once this many calls are stuck at the same time
+STUCK_CALL_LIMIT = 2
+# ... or once the smoothed call latency exceeds this (seconds)
+LATENCY_LIMIT = 5.0
+LATENCY_EWMA_ALPHA = 0.2
+# How long the breaker stays open before one probe call is let through
+BREAKER_RESET_TIMEOUT = 30.0
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+class CircuitOpenError(OSError):
+    """Raised instead of issuing a syscall to a share that is failing"""
+
+class ShareExecutor(ThreadPoolExecutor):
+    """Thread pool for one share path with a circuit breaker in front
+
+    Every submitted call is timed. asyncio timeouts only abandon the await,
+    so calls still running after STUCK_CALL_AFTER are counted as stuck. Too
+    many stuck calls, or slow calls, open the breaker and new submissions
+    fail fast with CircuitOpenError. After BREAKER_RESET_TIMEOUT a single
+    call is let through as a probe, and its outcome closes or reopens the
+    breaker.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_workers: int = SHARE_IO_WORKERS,
+        stuck_after: float = STUCK_CALL_AFTER,
+        stuck_limit: int = STUCK_CALL_LIMIT,
+        latency_limit: float = LATENCY_LIMIT,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT
+    ):
+        super().__init__(max_workers=max_workers, thread_name_prefix='share-io')
+        self.path = path
+        self.workers = max_workers
+        self.stuck_after = stuck_after
+        self.stuck_limit = stuck_limit
+        self.latency_limit = latency_limit
+        self.reset_timeout = reset_timeout
+        self.state = BREAKER_CLOSED
+        self.latency: Optional[float] = None
+        self.calls = 0
+        self.rejected = 0
+        self.trips = 0
+        self._in_flight: Dict[int, float] = {}
+        self._ids = itertools.count()
+        self._opened_at = 0.0
+        self._probe: Optional[int] = None
+        self._state_lock = threading.Lock()
+
+    def _stuck(self, now: float) -> int:
+        return sum(1 for started in self._in_flight.values() if now - started > self.stuck_after)
+
+    def _open(self, reason: str):
+        if self.state != BREAKER_OPEN:
+            self.trips += 1
+            logger.warning(f"Circuit breaker for {self.path} opened: {reason}")
+        self.state = BREAKER_OPEN
+        self._opened_at = time.monotonic()
+        self._probe = None
+
+    def _admit(self) -> Tuple[int, bool]:
+        """Decide whether a call may run; returns (call id, is probe)"""
+        now = time.monotonic()
+        with self._state_lock:
+            if self.state == BREAKER_CLOSED:
+                stuck = self._stuck(now)
+                if stuck >= self.stuck_limit:
+                    self._open(f"{stuck} calls stuck for over {self.stuck_after:.0f}s")
+
+            if self.state == BREAKER_OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = BREAKER_HALF_OPEN
+
+            if self.state == BREAKER_HALF_OPEN and self._probe is not None:
+                if now - self._in_flight.get(self._probe, now) > self.stuck_after:
+                    self._open("probe call stuck")
+
+            probe = False
+            if self.state == BREAKER_OPEN or (self.state == BREAKER_HALF_OPEN and self._probe is not None):
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {self.path}")
+
+            call_id = next(self._ids)
+            if self.state == BREAKER_HALF_OPEN:
+                self._probe = call_id
+                probe = True
+            self._in_flight[call_id] = now
+            self.calls += 1
+            return call_id, probe
+
+    def submit(self, fn, /, *args, **kwargs):
+        call_id, probe = self._admit()
+        try:
+            future = super().submit(fn, *args, **kwargs)
+        except Exception:
+            with self._state_lock:
+                self._in_flight.pop(call_id, None)
+                if probe:
+                    self._probe = None
+            raise
+        future.add_done_callback(functools.partial(self._finished, call_id, probe))
+        return future
+
+    def _finished(self, call_id: int, probe: bool, future):
+        now = time.monotonic()
+        with self._state_lock:
+            started = self._in_flight.pop(call_id, now)
+            elapsed = now - started
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency += LATENCY_EWMA_ALPHA * (elapsed - self.latency)
+
+            if probe:
+                if elapsed <= self.latency_limit:
+                    self.state = BREAKER_CLOSED
+                    self.latency = elapsed
+                    self._probe = None
+                    logger.info(f"Circuit breaker for {self.path} closed after probe ({elapsed:.2f}s)")
+                else:
+                    self._open(f"probe took {elapsed:.1f}s")
+            elif self.state == BREAKER_CLOSED and self.latency > self.latency_limit:
+                self._open(f"latency {self.latency:.1f}s")
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking call on this share's pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, functools.partial(func, *args, **kwargs))
+
+    def queue_depth(self) -> int:
+        """Calls submitted but not yet picked up by a thread"""
+        return self._work_queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and call accounting"""
+        now = time.monotonic()
+        with self._state_lock:
+            return {
+                'path': self.path,
+                'state': self.state,
+                'workers': self.workers,
+                'inFlight': len(self._in_flight),
+                'queued': self.queue_depth(),
+                'stuck': self._stuck(now),
+                'latency': round(self.latency, 4) if self.latency is not None else None,
+                'calls': self.calls,
+                'rejected': self.rejected,
+                'trips': self.trips
+            }
+
+_executors: Dict[str, ShareExecutor] = {}
+_executors_lock = threading.Lock()
+
+def share_executor(path) -> ShareExecutor:
+    """The executor for a share path, created on first use"""
+    key = str(path)
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            executor = _executors[key] = ShareExecutor(key)
+        return executor
+
+def all_share_executors() -> Dict[str, ShareExecutor]:
+    with _executors_lock:
+        return dict(_executors)
+
+def shutdown_share_executors():
+    """Stop accepting work; stuck threads are not waited for"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+SHARE_IO_QUEUE_DEPTH.callback = lambda: {(path,): e.queue_depth() for path, e in all_share_executors().items()}
+SHARE_IO_IN_FLIGHT.callback = lambda: {(path,): len(e._in_flight) for path, e in all_share_executors().items()}
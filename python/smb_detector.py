@@ -8,9 +8,14 @@ import logging
 import os
 import platform
 import subprocess
+import time
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
+from log_catalog import log_catalog
+from metrics import PATH_PROBE_SECONDS
+from share_io import share_executor
+
 logger = logging.getLogger(__name__)
 
 class SMBPathDetector:
@@ -76,13 +81,15 @@ class SMBPathDetector:
             'error': None,
             'response_time': None
         }
+        probe_started = time.perf_counter()
         
         try:
+            io = share_executor(path)
             start_time = asyncio.get_event_loop().time()
             
             # Test path existence (with timeout)
             exists = await asyncio.wait_for(
-                asyncio.to_thread(path_obj.exists),
+                io.run(path_obj.exists),
                 timeout=timeout
             )
             
@@ -92,13 +99,13 @@ class SMBPathDetector:
             if exists:
                 # Test readability
                 result['readable'] = await asyncio.wait_for(
-                    asyncio.to_thread(os.access, path, os.R_OK),
+                    io.run(os.access, path, os.R_OK),
                     timeout=timeout
                 )
                 
                 # Test writability
                 result['writable'] = await asyncio.wait_for(
-                    asyncio.to_thread(os.access, path, os.W_OK),
+                    io.run(os.access, path, os.W_OK),
                     timeout=timeout
                 )
                 
@@ -106,7 +113,7 @@ class SMBPathDetector:
                 if result['readable']:
                     try:
                         log_files = await asyncio.wait_for(
-                            asyncio.to_thread(self._count_log_files, path),
+                            self._count_log_files(path),
                             timeout=timeout
                         )
                         result['log_files_count'] = log_files
@@ -121,16 +128,14 @@ class SMBPathDetector:
             result['error'] = str(e)
             logger.debug(f"Path test failed for {path}: {e}")
         
+        PATH_PROBE_SECONDS.labels(path).observe(time.perf_counter() - probe_started)
         return result
     
-    def _count_log_files(self, path: str) -> int:
-        """Count ACTSentinel log files in directory"""
-        try:
-            path_obj = Path(path)
-            log_files = list(path_obj.glob("ACTSentinel*.log"))
-            return len(log_files)
-        except Exception:
-            return 0
+    async def _count_log_files(self, path: str) -> int:
+        """Count ACTSentinel log files in directory, from its shared catalog"""
+        catalog = log_catalog(path)
+        await catalog.refresh()
+        return len(catalog)
     
     async def test_all_paths(self, timeout: float = 10.0) -> List[Dict[str, Any]]:
         """Test all possible paths concurrently"""
@@ -163,7 +168,11 @@ class SMBPathDetector:
     async def find_accessible_path(self, timeout: float = 10.0) -> Optional[str]:
         """Find the first accessible SMB path"""
         results = await self.test_all_paths(timeout)
-        
+        return self.select_best_path(results)
+    
+    @staticmethod
+    def select_best_path(results: List[Dict[str, Any]]) -> Optional[str]:
+        """Pick the preferred accessible path from test_path_access results"""
         # Sort by preference (exists + readable + has log files)
         accessible_paths = [
             r for r in results 
@@ -3,12 +3,277 @@
  * Enhanced version with WebSocket support and better error handling
  */
 
+const BATCH_MAGIC = 0x31424c41; // "ALB1" read as a little-endian u32
+const utf8Decoder = new TextDecoder('utf-8');
+
+/**
+ * Decode a binary log batch (see transport.py):
+ * magic | u32 meta length | meta JSON | u32 count | u32 lengths[count] | UTF-8 lines
+ */
+function decodeBatch(buffer) {
+    const view = new DataView(buffer);
+    if (view.getUint32(0, true) !== BATCH_MAGIC) {
+        throw new Error('Not a log batch');
+    }
+    const metaLength = view.getUint32(4, true);
+    const meta = JSON.parse(utf8Decoder.decode(new Uint8Array(buffer, 8, metaLength)));
+
+    let pos = 8 + metaLength;
+    const count = view.getUint32(pos, true);
+    pos += 4;
+    let dataPos = pos + 4 * count;
+    const bytes = new Uint8Array(buffer);
+    const lines = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const length = view.getUint32(pos + 4 * i, true);
+        lines[i] = utf8Decoder.decode(bytes.subarray(dataPos, dataPos + length));
+        dataPos += length;
+    }
+    return { meta, lines };
+}
+
+// Lines kept in the browser; older ones are dropped from the top
+const MAX_STORED_LINES = 50000;
+// Rows rendered above and below the visible window
+const OVERSCAN_ROWS = 20;
+
+/**
+ * Bounded store of log lines. Every line gets an increasing id, so views
+ * can keep id lists that stay valid while old lines are evicted.
+ */
+class LineStore {
+    constructor(capacity = MAX_STORED_LINES) {
+        this.capacity = capacity;
+        this.texts = [];
+        // null for log lines, 'error' or 'notice' for messages from the monitor
+        this.kinds = [];
+        this.firstId = 0;
+    }
+
+    get length() {
+        return this.texts.length;
+    }
+
+    get nextId() {
+        return this.firstId + this.texts.length;
+    }
+
+    push(text, kind = null) {
+        this.texts.push(text);
+        this.kinds.push(kind);
+        return this.nextId - 1;
+    }
+
+    text(id) {
+        return this.texts[id - this.firstId];
+    }
+
+    kind(id) {
+        return this.kinds[id - this.firstId];
+    }
+
+    /** Evict down to capacity, with 10% slack so splicing stays amortised */
+    trim() {
+        const excess = this.texts.length - this.capacity;
+        if (excess <= this.capacity / 10) {
+            return false;
+        }
+        this.texts.splice(0, excess);
+        this.kinds.splice(0, excess);
+        this.firstId += excess;
+        return true;
+    }
+
+    clear() {
+        this.firstId = this.nextId;
+        this.texts = [];
+        this.kinds = [];
+    }
+}
+
+/**
+ * Virtualised view over a LineStore. Filtering and highlighting work on the
+ * stored strings; only the rows inside the scroll window exist in the DOM,
+ * and they are redrawn at most once per animation frame.
+ */
+class LogView {
+    constructor(container, content, store) {
+        this.container = container;
+        this.content = content;
+        this.store = store;
+        this.visible = [];
+        this.filterText = '';
+        this.highlightRegex = null;
+        // Bumped when highlights change so recycled rows are redrawn
+        this.version = 0;
+        this.follow = true;
+        this.frame = null;
+
+        this.rows = document.createElement('div');
+        this.rows.className = 'log-rows';
+        this.content.appendChild(this.rows);
+        this.pool = [];
+        this.measure();
+        window.addEventListener('resize', () => {
+            this.measure();
+            this.scheduleRender();
+        });
+    }
+
+    measure() {
+        const probe = document.createElement('div');
+        probe.className = 'log-line';
+        probe.textContent = 'X';
+        this.rows.appendChild(probe);
+        this.rowHeight = probe.offsetHeight || 22;
+        this.rows.removeChild(probe);
+        this.offset = this.content.offsetTop + (parseFloat(getComputedStyle(this.content).paddingTop) || 0);
+        this.version++;
+    }
+
+    get totalCount() {
+        return this.store.length;
+    }
+
+    get visibleCount() {
+        return this.visible.length;
+    }
+
+    matches(id) {
+        return !this.filterText || this.store.kind(id) !== null
+            || this.store.text(id).toLowerCase().includes(this.filterText);
+    }
+
+    add(entries) {
+        const firstNew = this.store.nextId;
+        entries.forEach(([text, kind]) => this.store.push(text, kind));
+        if (this.store.trim()) {
+            // Drop ids that fell out of the store
+            const firstId = this.store.firstId;
+            let cut = 0;
+            while (cut < this.visible.length && this.visible[cut] < firstId) cut++;
+            this.visible = this.visible.slice(cut);
+        }
+        for (let id = Math.max(firstNew, this.store.firstId); id < this.store.nextId; id++) {
+            if (this.matches(id)) this.visible.push(id);
+        }
+        this.scheduleRender();
+    }
+
+    setFilter(text) {
+        text = text.toLowerCase().trim();
+        if (text === this.filterText) return;
+        this.filterText = text;
+        const visible = [];
+        for (let id = this.store.firstId; id < this.store.nextId; id++) {
+            if (this.matches(id)) visible.push(id);
+        }
+        this.visible = visible;
+        this.scheduleRender();
+    }
+
+    setHighlights(words) {
+        // One alternation; the matching group picks the colour
+        this.highlightRegex = words.length
+            ? new RegExp(words.map(w => `(${w.replace(/[.*+?^${}()|[\]\\]/g, '\\$&')})`).join('|'), 'gi')
+            : null;
+        this.version++;
+        this.scheduleRender();
+    }
+
+    clear() {
+        this.store.clear();
+        this.visible = [];
+        this.scheduleRender();
+    }
+
+    scheduleRender() {
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => this.render());
+        }
+    }
+
+    render() {
+        this.frame = null;
+        const rowHeight = this.rowHeight;
+        const total = this.visible.length;
+        this.content.style.height = `${total * rowHeight}px`;
+        if (this.follow) {
+            this.container.scrollTop = this.container.scrollHeight;
+        }
+
+        const top = this.container.scrollTop - this.offset;
+        const first = Math.max(0, Math.floor(top / rowHeight) - OVERSCAN_ROWS);
+        const last = Math.min(total, Math.ceil((top + this.container.clientHeight) / rowHeight) + OVERSCAN_ROWS);
+
+        while (this.pool.length < last - first) {
+            const row = document.createElement('div');
+            this.rows.appendChild(row);
+            this.pool.push(row);
+        }
+        this.rows.style.transform = `translateY(${first * rowHeight}px)`;
+
+        this.pool.forEach((row, i) => {
+            const id = first + i < last ? this.visible[first + i] : undefined;
+            if (id === undefined) {
+                row.style.display = 'none';
+                row.lineId = undefined;
+                return;
+            }
+            row.style.display = '';
+            if (row.lineId !== id || row.version !== this.version) {
+                this.renderRow(row, id);
+            }
+        });
+    }
+
+    renderRow(row, id) {
+        const text = this.store.text(id);
+        const kind = this.store.kind(id);
+        row.className = kind ? `log-line ${kind}-message` : 'log-line';
+        row.title = text;
+        row.lineId = id;
+        row.version = this.version;
+
+        const regex = this.highlightRegex;
+        if (!regex || kind) {
+            row.textContent = text;
+            return;
+        }
+        // Text nodes and spans, never innerHTML with log content
+        const fragment = document.createDocumentFragment();
+        let pos = 0;
+        regex.lastIndex = 0;
+        let match;
+        while ((match = regex.exec(text)) !== null) {
+            if (match[0] === '') {
+                regex.lastIndex++;
+                continue;
+            }
+            const group = match.findIndex((value, i) => i > 0 && value !== undefined);
+            fragment.appendChild(document.createTextNode(text.slice(pos, match.index)));
+            const span = document.createElement('span');
+            span.className = `highlight-${((group - 1) % 5) + 1}`;
+            span.textContent = match[0];
+            fragment.appendChild(span);
+            pos = match.index + match[0].length;
+        }
+        fragment.appendChild(document.createTextNode(text.slice(pos)));
+        row.replaceChildren(fragment);
+    }
+}
+
 class LogMonitor {
     constructor() {
         this.isConnected = false;
         this.isPaused = false;
         this.autoScroll = true;
-        this.lastSize = 0;
+        this.lastSeq = null;
+        this.streamId = null;
+        // While a catch-up fetch runs, WebSocket batches are held back here
+        this.resyncing = false;
+        this.heldUpdates = [];
+        this.initRetry = null;
         this.currentFilter = '';
         this.highlights = [];
         this.websocket = null;
@@ -53,6 +318,7 @@ class LogMonitor {
         // Content elements
         this.logContainer = document.getElementById('log-container');
         this.logContent = document.getElementById('log-content');
+        this.logView = new LogView(this.logContainer, this.logContent, new LineStore());
 
         // Modal elements
         this.statusModal = document.getElementById('status-modal');
@@ -92,16 +358,22 @@ class LogMonitor {
 
     connectWebSocket() {
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws`;
+        const wsUrl = `${protocol}//${window.location.host}/ws?format=batch`;
         
         try {
             this.websocket = new WebSocket(wsUrl);
+            this.websocket.binaryType = 'arraybuffer';
             
             this.websocket.onopen = () => {
                 console.log('WebSocket connected');
                 this.isConnected = true;
                 this.reconnectAttempts = 0;
                 this.updateConnectionStatus('Connected', 'success');
+
+                // Fetch whatever arrived while we were disconnected
+                if (this.lastSeq !== null) {
+                    this.resync();
+                }
                 
                 // Send ping to keep connection alive
                 this.startPingInterval();
@@ -109,7 +381,15 @@ class LogMonitor {
             
             this.websocket.onmessage = (event) => {
                 try {
-                    const data = JSON.parse(event.data);
+                    let data;
+                    if (event.data instanceof ArrayBuffer) {
+                        // Log updates arrive as binary batches
+                        const batch = decodeBatch(event.data);
+                        data = { type: batch.meta.type, data: batch.meta };
+                        data.data.newLines = batch.lines;
+                    } else {
+                        data = JSON.parse(event.data);
+                    }
                     this.handleWebSocketMessage(data);
                 } catch (e) {
                     console.error('Error parsing WebSocket message:', e);
@@ -143,7 +423,40 @@ class LogMonitor {
         }
         
         if (data.type === 'log_update' && data.data) {
-            this.handleLogUpdate(data.data);
+            if (this.resyncing) {
+                this.heldUpdates.push(data.data);
+            } else {
+                this.handleLogUpdate(data.data);
+            }
+        }
+
+        if (data.type === 'gap') {
+            // Server dropped queued updates for us; catch up from its buffer
+            console.log(`Server skipped ${data.dropped} updates, resyncing`);
+            this.resync();
+        }
+    }
+
+    async resync() {
+        // Fetch from lastSeq, then apply the WebSocket batches held meanwhile
+        if (this.resyncing) {
+            return;
+        }
+        this.resyncing = true;
+        try {
+            await this.fetchLogs();
+        } finally {
+            this.resyncing = false;
+        }
+        // Batches the fetch already covered are skipped; a hole starts another resync
+        const held = this.heldUpdates;
+        this.heldUpdates = [];
+        for (let i = 0; i < held.length; i++) {
+            this.handleLogUpdate(held[i]);
+            if (this.resyncing) {
+                this.heldUpdates = held.slice(i + 1).concat(this.heldUpdates);
+                break;
+            }
         }
     }
 
@@ -200,29 +513,53 @@ class LogMonitor {
 
     async loadInitialData() {
         this.updateConnectionStatus('Loading...', 'warning');
-        await this.fetchLogs();
+        await this.resync();
     }
 
     async fetchLogs() {
         const startTime = Date.now();
         
         try {
-            const params = new URLSearchParams({
-                lastSize: this.lastSize.toString(),
-                maxLines: '1000'
-            });
+            const params = new URLSearchParams({ maxLines: '1000', format: 'batch' });
+            if (this.lastSeq !== null) {
+                params.set('since', this.lastSeq.toString());
+            }
+            if (this.streamId) {
+                params.set('stream', this.streamId);
+            }
             
             const response = await fetch(`/api/logs?${params}`);
             const responseTime = Date.now() - startTime;
             
             this.updateResponseTime(responseTime);
+
+            if (response.status === 503) {
+                // Server is still starting up; try again when it says to
+                const data = await response.json();
+                if (data.initializing) {
+                    this.handleInitializing(data);
+                    return;
+                }
+            }
             
             if (!response.ok) {
                 throw new Error(`HTTP ${response.status}: ${response.statusText}`);
             }
             
-            const data = await response.json();
+            let data;
+            if ((response.headers.get('Content-Type') || '').startsWith('application/x-act-batch')) {
+                const batch = decodeBatch(await response.arrayBuffer());
+                data = batch.meta;
+                data.newLines = batch.lines;
+            } else {
+                data = await response.json();
+            }
             this.handleLogUpdate(data);
+
+            // Still behind the server: page forward right away
+            if (data.success && data.hasMore && data.nextSeq > data.startSeq) {
+                await this.fetchLogs();
+            }
             
         } catch (error) {
             console.error('Error fetching logs:', error);
@@ -231,6 +568,17 @@ class LogMonitor {
         }
     }
 
+    handleInitializing(data) {
+        const state = data.initialization || {};
+        this.updateConnectionStatus(state.state === 'failed' ? 'Share unavailable, retrying' : 'Initializing...', 'warning');
+        if (!this.initRetry) {
+            this.initRetry = setTimeout(() => {
+                this.initRetry = null;
+                this.fetchLogs();
+            }, (data.retryAfter || 1) * 1000);
+        }
+    }
+
     handleLogUpdate(data) {
         if (!data.success) {
             this.showErrorInLog(data.error || 'Unknown error');
@@ -246,68 +594,63 @@ class LogMonitor {
             this.currentFile.textContent = data.filename;
         }
         
-        if (data.size !== undefined) {
-            this.lastSize = data.size;
+        // A new stream means the server restarted; its seq numbers start over
+        if (data.streamId && data.streamId !== this.streamId) {
+            if (this.streamId !== null && !data.reset) {
+                this.lastSeq = null;
+            }
+            this.streamId = data.streamId;
+        }
+        if (data.reset) {
+            this.lastSeq = null;
+            this.showNoticeInLog('Server restarted, resuming from its current log position');
+        }
+        if (data.gap && data.missedLines > 0) {
+            this.showNoticeInLog(`${data.missedLines} lines missed, they are no longer available`);
+        }
+
+        // Skip batches already received through the other channel
+        let lines = data.newLines || [];
+        if (data.nextSeq !== undefined) {
+            if (this.lastSeq !== null && data.startSeq > this.lastSeq && !data.gap) {
+                // Lines before this batch have not arrived yet; fetch them rather than skip the hole
+                this.resync();
+                return;
+            }
+            if (this.lastSeq !== null && data.nextSeq <= this.lastSeq) {
+                lines = [];
+            } else if (this.lastSeq !== null && data.startSeq < this.lastSeq) {
+                lines = lines.slice(this.lastSeq - data.startSeq);
+            }
+            this.lastSeq = Math.max(this.lastSeq || 0, data.nextSeq);
         }
 
         // Add new lines if any
-        if (data.hasNewData && data.newLines && data.newLines.length > 0) {
-            this.addLogLines(data.newLines);
+        if (data.hasNewData && lines.length > 0) {
+            this.addLogLines(lines);
         }
 
         this.updateStats();
     }
 
     addLogLines(lines) {
-        const fragment = document.createDocumentFragment();
-        
-        lines.forEach(line => {
-            if (line.trim()) {
-                const lineElement = document.createElement('div');
-                lineElement.className = 'log-line';
-                lineElement.textContent = line;
-                fragment.appendChild(lineElement);
-            }
-        });
-        
-        this.logContent.appendChild(fragment);
-        
-        // Auto-scroll if enabled
-        if (this.autoScroll) {
-            this.scrollToBottom();
-        }
-        
-        // Apply current filter and highlights
-        this.applyFilter();
-        this.applyHighlights();
+        this.logView.add(lines.filter(line => line.trim()).map(line => [line, null]));
+        this.updateStats();
     }
 
     showErrorInLog(message) {
-        const errorElement = document.createElement('div');
-        errorElement.className = 'log-line error-message';
-        errorElement.textContent = `[ERROR] ${new Date().toLocaleTimeString()}: ${message}`;
-        this.logContent.appendChild(errorElement);
-        
-        if (this.autoScroll) {
-            this.scrollToBottom();
-        }
+        this.logView.add([[`[ERROR] ${new Date().toLocaleTimeString()}: ${message}`, 'error']]);
+        this.updateStats();
+    }
+
+    showNoticeInLog(message) {
+        this.logView.add([[`[NOTICE] ${new Date().toLocaleTimeString()}: ${message}`, 'notice']]);
+        this.updateStats();
     }
 
     applyFilter() {
-        const filterText = this.filterInput.value.toLowerCase().trim();
-        this.currentFilter = filterText;
-        
-        const logLines = this.logContent.querySelectorAll('.log-line');
-        let visibleCount = 0;
-        
-        logLines.forEach(line => {
-            const text = line.textContent.toLowerCase();
-            const shouldShow = !filterText || text.includes(filterText);
-            
-            line.style.display = shouldShow ? '' : 'none';
-            if (shouldShow) visibleCount++;
-        });
-        
+        this.currentFilter = this.filterInput.value.toLowerCase().trim();
+        this.logView.setFilter(this.currentFilter);
         this.updateStats();
     }
 
@@ -319,20 +662,7 @@ class LogMonitor {
     applyHighlights() {
         const highlightText = this.highlightInput.value.trim();
         this.highlights = highlightText ? highlightText.split(',').map(h => h.trim()).filter(h => h) : [];
-        
-        const logLines = this.logContent.querySelectorAll('.log-line');
-        
-        logLines.forEach(line => {
-            let html = line.textContent;
-            
-            this.highlights.forEach((highlight, index) => {
-                const colorClass = `highlight-${(index % 5) + 1}`;
-                const regex = new RegExp(`(${this.escapeRegex(highlight)})`, 'gi');
-                html = html.replace(regex, `<span class="${colorClass}">$1</span>`);
-            });
-            
-            line.innerHTML = html;
-        });
+        this.logView.setHighlights(this.highlights);
     }
 
     clearHighlights() {
@@ -340,10 +670,6 @@ class LogMonitor {
         this.applyHighlights();
     }
 
-    escapeRegex(string) {
-        return string.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
-    }
-
     togglePause() {
         this.isPaused = !this.isPaused;
         this.pauseBtn.textContent = this.isPaused ? '▶ Resume' : '⏸ Pause';
@@ -355,13 +681,13 @@ class LogMonitor {
     }
 
     clearLog() {
-        this.logContent.innerHTML = '';
-        this.lastSize = 0;
+        this.logView.clear();
         this.updateStats();
     }
 
     scrollToBottom() {
-        this.logContainer.scrollTop = this.logContainer.scrollHeight;
+        this.logView.follow = true;
+        this.logView.scheduleRender();
     }
 
     checkAutoScroll() {
@@ -369,6 +695,8 @@ class LogMonitor {
         const threshold = 50; // pixels from bottom
         
         this.autoScroll = (container.scrollTop + container.clientHeight + threshold) >= container.scrollHeight;
+        this.logView.follow = this.autoScroll;
+        this.logView.scheduleRender();
         this.autoScrollStatus.textContent = this.autoScroll ? 'ON' : 'OFF';
         this.autoScrollStatus.className = this.autoScroll ? 'auto-scroll-on' : 'auto-scroll-off';
     }
@@ -441,12 +769,9 @@ class LogMonitor {
     }
 
     updateStats() {
-        const allLines = this.logContent.querySelectorAll('.log-line');
-        const visibleLines = this.logContent.querySelectorAll('.log-line:not([style*="display: none"])');
-        
-        this.totalLines.textContent = allLines.length;
-        this.filteredLines.textContent = visibleLines.length;
-        this.lineCount.textContent = visibleLines.length;
+        this.totalLines.textContent = this.logView.totalCount;
+        this.filteredLines.textContent = this.logView.visibleCount;
+        this.lineCount.textContent = this.logView.visibleCount;
     }
 
     handleKeyboard(e) {
@@ -0,0 +1,102 @@
+"""
+WebSocket Subscriptions for ACT Sentinel log monitor
+Server-side filters applied to each new batch before it is sent
+"""
+
+import re
+from typing import Optional, Dict, Any, List, Iterable, Pattern, Tuple
+
+from log_records import RecordBatch, RecordFilter
+
+MAX_FILTER_LENGTH = 500
+
+def _string_field(spec: Dict[str, Any], name: str) -> Optional[str]:
+    """An optional string member of a filter object; raises ValueError for other types"""
+    value = spec.get(name) or None
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"'{name}' must be a string")
+    return value
+
+class Subscription:
+    """Level/component/substring/regex filter for one WebSocket feed
+
+    Compiled once when the client subscribes. Clients with equal keys share
+    one Subscription so each distinct filter runs once per batch.
+    """
+
+    def __init__(
+        self,
+        level: Optional[str] = None,
+        components: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        regex: Optional[str] = None,
+        ignore_case: bool = True
+    ):
+        components = sorted({c.strip() for c in components or () if c and c.strip()})
+        for value in (text, regex):
+            if value and len(value) > MAX_FILTER_LENGTH:
+                raise ValueError(f"Filter longer than {MAX_FILTER_LENGTH} characters")
+
+        self.record_filter = RecordFilter(level, components or None)
+        self.level = level.upper() if level else None
+        self.components = components
+        self.text = text or None
+        self.regex = regex or None
+        self.ignore_case = ignore_case
+
+        # Lines are matched as raw UTF-8 slices of the batch buffer
+        flags = re.IGNORECASE if ignore_case else 0
+        self._patterns: List[Pattern[bytes]] = []
+        try:
+            if self.text:
+                self._patterns.append(re.compile(re.escape(self.text.encode('utf-8')), flags))
+            if self.regex:
+                self._patterns.append(re.compile(self.regex.encode('utf-8'), flags))
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}")
+
+        self.key: Tuple = (self.level, tuple(components), self.text, self.regex, ignore_case)
+
+    @classmethod
+    def from_message(cls, data: Dict[str, Any]) -> Optional['Subscription']:
+        """Build from a subscribe message's 'filter' object; None subscribes to everything"""
+        spec = data.get('filter') or {}
+        if not isinstance(spec, dict):
+            raise ValueError("'filter' must be an object")
+        components = spec.get('components') or spec.get('component') or []
+        if isinstance(components, str):
+            components = components.split(',')
+        if not isinstance(components, list) or not all(isinstance(c, str) for c in components):
+            raise ValueError("'components' must be a string or a list of strings")
+        subscription = cls(
+            level=_string_field(spec, 'level'),
+            components=components,
+            text=_string_field(spec, 'text'),
+            regex=_string_field(spec, 'regex'),
+            ignore_case=bool(spec.get('ignoreCase', True))
+        )
+        return None if subscription.matches_all else subscription
+
+    @property
+    def matches_all(self) -> bool:
+        return self.record_filter.empty and not self._patterns
+
+    def select(self, batch: RecordBatch, first: int, last: int) -> List[str]:
+        """Lines of batch[first:last] that pass the filter"""
+        indices = self.record_filter.indices(batch, first, last)
+        if self._patterns:
+            data, offsets = batch.data, batch.offsets
+            indices = [
+                i for i in indices
+                if all(p.search(data[offsets[i]:offsets[i + 1]]) for p in self._patterns)
+            ]
+        return [batch.line(i) for i in indices]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'level': self.level,
+            'components': self.components,
+            'text': self.text,
+            'regex': self.regex,
+            'ignoreCase': self.ignore_case
+        }
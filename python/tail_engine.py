@@ -0,0 +1,452 @@
+"""
+Tail Engine for ACT Sentinel logs
+Single reader that owns the file cursor and serves every client from memory
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+
+from file_watcher import LogWatcher
+from log_reader import LogReader
+from log_rollups import LogRollups
+from log_records import RecordBatch, RecordFilter
+from metrics import POLL_BYTES, POLL_LINES, POLL_SECONDS, READ_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Parse lines into level/component/timestamp columns as they are buffered
+PARSE_RECORDS = True
+
+# Batch checkpoints kept for replaying evicted lines from the log file
+SEQ_CHECKPOINTS = 20000
+
+class RingBuffer:
+    """Bounded line buffer with monotonically increasing sequence numbers
+
+    Lines are held as RecordBatch objects, one per append; the oldest batch
+    is trimmed from the front and dropped once fully evicted.
+    """
+
+    def __init__(self, capacity: int = 10000, parse: bool = PARSE_RECORDS):
+        self.capacity = capacity
+        self.parse = parse
+        self._batches: deque = deque()
+        # Sequence number of each batch's first line and its log file, parallel to _batches
+        self._starts: deque = deque()
+        self._files: deque = deque()
+        # Lines already evicted from the front of the first batch
+        self._head = 0
+        self._size = 0
+        self.next_seq = 0
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest line still held"""
+        return self.next_seq - self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append_lines(self, lines: List[str], file_id: Optional[str] = None) -> int:
+        """Append lines read from file_id and return the sequence number of the first one"""
+        if not lines:
+            return self.next_seq
+        return self.append_batch(RecordBatch(lines, self.parse), file_id)
+
+    def append_batch(self, batch: RecordBatch, file_id: Optional[str] = None) -> int:
+        """Append an already packed batch and return the sequence number of its first line"""
+        start_seq = self.next_seq
+        if not len(batch):
+            return start_seq
+        self._batches.append(batch)
+        self._starts.append(start_seq)
+        self._files.append(file_id)
+        self._size += len(batch)
+        self.next_seq += len(batch)
+
+        while self._size > self.capacity:
+            excess = self._size - self.capacity
+            available = len(self._batches[0]) - self._head
+            if excess >= available:
+                self._batches.popleft()
+                self._starts.popleft()
+                self._files.popleft()
+                self._head = 0
+                self._size -= available
+            else:
+                self._head += excess
+                self._size -= excess
+        return start_seq
+
+    def slices(self, start: int, stop: int):
+        """Yield (batch, first, last) covering sequence numbers [start, stop)"""
+        index = max(bisect_right(self._starts, start) - 1, 0)
+        while index < len(self._batches) and start < stop:
+            batch = self._batches[index]
+            batch_start = self._starts[index]
+            first = start - batch_start
+            last = min(len(batch), stop - batch_start)
+            if last > first:
+                yield batch, first, last
+            start = batch_start + len(batch)
+            index += 1
+
+    def ranges(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """(fileId, startSeq, endSeq) runs covering sequence numbers [start, stop)"""
+        ranges = []
+        if start >= stop or not self._batches:
+            return ranges
+        index = max(bisect_right(self._starts, start) - 1, 0)
+        while index < len(self._batches) and start < stop:
+            file_id = self._files[index]
+            end = min(self._starts[index] + len(self._batches[index]), stop)
+            if ranges and ranges[-1]['fileId'] == file_id:
+                ranges[-1]['endSeq'] = end
+            else:
+                ranges.append({'fileId': file_id, 'startSeq': start, 'endSeq': end})
+            start = end
+            index += 1
+        return ranges
+
+    def since(self, seq: int, max_lines: int, record_filter: Optional[RecordFilter] = None) -> Dict[str, Any]:
+        """Return lines with sequence >= seq, at most max_lines of them
+
+        With a filter, max_lines bounds the lines scanned and only matching
+        lines are returned.
+        """
+        first_seq = self.first_seq
+        gap = seq < first_seq
+        start = max(seq, first_seq)
+        count = self.next_seq - start
+
+        if count <= 0:
+            return {'lines': [], 'startSeq': self.next_seq, 'gap': False, 'hasMore': False}
+
+        # Page forward from start; the caller continues from nextSeq
+        has_more = count > max_lines
+        count = min(count, max_lines)
+
+        lines = []
+        for batch, first, last in self.slices(start, start + count):
+            if record_filter is None or record_filter.empty:
+                lines.extend(batch.lines(first, last))
+            else:
+                lines.extend(batch.line(i) for i in record_filter.indices(batch, first, last))
+        return {'lines': lines, 'startSeq': start, 'gap': gap, 'hasMore': has_more}
+
+    def last(self, max_lines: int, record_filter: Optional[RecordFilter] = None) -> Dict[str, Any]:
+        """Return the newest max_lines lines"""
+        return self.since(max(self.next_seq - max_lines, 0), max_lines, record_filter)
+
+class SeqCheckpoints:
+    """Where each appended batch came from, kept after the buffer evicts it
+
+    A checkpoint maps a batch's first sequence number to the byte range of
+    its lines in the log file, so a resuming client can be replayed from
+    the file instead of being told it missed lines.
+    """
+
+    def __init__(self, capacity: int = SEQ_CHECKPOINTS):
+        self.seqs: deque = deque(maxlen=capacity)
+        # (count, file id, line start offset, line end offset, replayable)
+        self.entries: deque = deque(maxlen=capacity)
+
+    def add(self, seq: int, count: int, file_id: str, start: int, end: int, replayable: bool):
+        self.seqs.append(seq)
+        self.entries.append((count, file_id, start, end, replayable))
+
+    def forget_file(self, file_id: str):
+        """The file was truncated or replaced; its old offsets are meaningless"""
+        kept = [(seq, entry) for seq, entry in zip(self.seqs, self.entries) if entry[1] != file_id]
+        self.seqs.clear()
+        self.entries.clear()
+        for seq, entry in kept:
+            self.seqs.append(seq)
+            self.entries.append(entry)
+
+    def next_replayable(self, since: int, until: int) -> Optional[int]:
+        """First sequence number after since, before until, that can be replayed"""
+        for index in range(max(bisect_right(self.seqs, since), 0), len(self.seqs)):
+            seq = self.seqs[index]
+            if seq >= until:
+                break
+            if self.entries[index][4]:
+                return seq
+        return None
+
+    def locate(self, since: int, until: int) -> Optional[Dict[str, Any]]:
+        """Byte range to replay lines [since, until) from, limited to one file
+
+        Returns the file, start/end offsets, the lines to skip after start
+        and the sequence number the range reaches, or None.
+        """
+        index = bisect_right(self.seqs, since) - 1
+        if index < 0:
+            return None
+        count, file_id, start, end, replayable = self.entries[index]
+        first_seq = self.seqs[index]
+        if not replayable or since >= first_seq + count:
+            return None
+
+        # Extend across following batches while they continue the same byte range
+        reach = first_seq + count
+        while reach < until and index + 1 < len(self.seqs):
+            next_count, next_file, next_start, next_end, next_replayable = self.entries[index + 1]
+            if self.seqs[index + 1] != reach or next_file != file_id or next_start != end or not next_replayable:
+                break
+            index += 1
+            end = next_end
+            reach += next_count
+
+        return {
+            'fileId': file_id,
+            'start': start,
+            'end': end,
+            'skip': since - first_seq,
+            'reach': min(reach, until)
+        }
+
+class TailEngine:
+    def __init__(
+        self,
+        log_reader: LogReader,
+        buffer_size: int = 10000,
+        initial_lines: int = 1000,
+        watcher: Optional[LogWatcher] = None,
+        error_interval: float = 5.0
+    ):
+        self.log_reader = log_reader
+        self.buffer = RingBuffer(buffer_size)
+        self.initial_lines = initial_lines
+        self.watcher = watcher or LogWatcher(log_reader.smb_path)
+        self.error_interval = error_interval
+        self.listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self.result_listeners: List[Callable[[Dict[str, Any], float], None]] = []
+        self.primed = False
+        self.catching_up = False
+        self.last_result: Dict[str, Any] = {}
+        self.checkpoints = SeqCheckpoints()
+        self.rollups = LogRollups(log_reader)
+        # Sequence numbers only mean something within one engine lifetime
+        self.stream_id = uuid.uuid4().hex[:12]
+        self._lock = asyncio.Lock()
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Register a coroutine called with every new batch of lines"""
+        self.listeners.append(callback)
+
+    def add_result_listener(self, callback: Callable[[Dict[str, Any], float], None]):
+        """Register a function called with every read result and its duration"""
+        self.result_listeners.append(callback)
+
+    @property
+    def state_version(self) -> Tuple:
+        """Changes whenever a response built from the buffer could differ"""
+        meta = self.last_result
+        return (self.buffer.next_seq, meta.get('filename'), meta.get('size'), meta.get('success'))
+
+    async def ensure_primed(self):
+        """Load the initial window if no poll has completed yet"""
+        if not self.primed:
+            await self.poll()
+
+    async def poll(self) -> Optional[Dict[str, Any]]:
+        """Read new data from the share once and append it to the buffer"""
+        async with self._lock:
+            started = time.monotonic()
+            result = await self.log_reader.check_for_updates(self.initial_lines)
+            elapsed = time.monotonic() - started
+            self.primed = True
+            POLL_SECONDS.observe(elapsed)
+            for callback in self.result_listeners:
+                callback(result, elapsed)
+
+            if not result.get('success'):
+                READ_ERRORS.inc()
+                self.last_result = result
+                self.catching_up = False
+                return None
+
+            self.catching_up = bool(result.get('hasMore'))
+
+            # check_for_updates omits file metadata when nothing changed
+            self.last_result = {**self.last_result, **result}
+            file_id = result.get('filename')
+            if result.get('truncated') and file_id:
+                self.checkpoints.forget_file(file_id)
+                self.rollups.forget_file(file_id)
+            new_lines = result.get('newLines') or []
+            if 'bytesRead' in result:
+                POLL_BYTES.observe(result['bytesRead'])
+            POLL_LINES.observe(len(new_lines))
+            if not result.get('hasNewData') or not new_lines:
+                return None
+
+            batch = RecordBatch(new_lines, self.buffer.parse)
+            start_seq = self.buffer.append_batch(batch, file_id)
+            # Skipped or unparsed reads are left to the rollups' own catch-up scan
+            counted = self.buffer.parse and result.get('replayable')
+            self.rollups.add_batch(
+                file_id, batch, result.get('lineStart') if counted else None, result.get('lineEnd', 0)
+            )
+            self.checkpoints.add(
+                start_seq, len(new_lines), file_id,
+                result.get('lineStart', 0), result.get('lineEnd', 0),
+                bool(result.get('replayable'))
+            )
+            update = self._build_update(new_lines, start_seq, gap=False)
+            update['ranges'] = [{'fileId': file_id, 'startSeq': start_seq, 'endSeq': update['nextSeq']}]
+            update['skipped'] = result.get('skipped')
+            return update
+
+    async def switch_path(self, smb_path: str):
+        """Move the reader to another mount of the share between polls"""
+        async with self._lock:
+            self.log_reader.switch_path(smb_path)
+            self.watcher.set_directory(self.log_reader.smb_path)
+
+    async def run(self):
+        """Poll the share forever and notify listeners of new batches"""
+        logger.info("Starting tail engine")
+
+        try:
+            while True:
+                try:
+                    update = await self.poll()
+                    if update:
+                        await self._notify(update)
+                    await self.log_reader.update_index()
+                    if self.catching_up:
+                        # Drain a backlog without waiting between bounded reads
+                        await asyncio.sleep(0)
+                    else:
+                        await self.watcher.wait(update is not None)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in tail engine: {e}")
+                    await asyncio.sleep(self.error_interval)
+        finally:
+            self.watcher.close()
+
+    async def _notify(self, update: Dict[str, Any]):
+        """Deliver a batch to every listener"""
+        for callback in self.listeners:
+            try:
+                await callback(update)
+            except Exception as e:
+                logger.error(f"Tail engine listener failed: {e}")
+
+    async def get_logs(
+        self,
+        since: Optional[int] = None,
+        max_lines: int = 1000,
+        record_filter: Optional[RecordFilter] = None,
+        stream_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Answer a client request from the buffer, or replay from the log file
+
+        Never moves the reader's cursor. A since older than the buffer is
+        replayed from the file when its checkpoints allow, otherwise the
+        response is marked as a gap with the number of lines missed. A
+        stream_id from an earlier engine means the client's sequence numbers
+        are meaningless, so it gets a fresh window with reset set.
+        """
+        if not self.last_result.get('success') and not len(self.buffer):
+            return {
+                'success': False,
+                'error': self.last_result.get('error', 'No log data available yet'),
+                'timestamp': datetime.now().isoformat()
+            }
+
+        reset = bool(stream_id) and stream_id != self.stream_id
+        if reset:
+            since = None
+
+        if since is not None and since < self.buffer.first_seq:
+            replay = await self._replay(since, max_lines, record_filter)
+            if replay:
+                return replay
+            # Skip only the lines that cannot be re-read
+            resume = self.checkpoints.next_replayable(since, self.buffer.first_seq)
+            replay = await self._replay(resume, max_lines, record_filter) if resume is not None else None
+            if replay:
+                replay['gap'] = True
+                replay['missedLines'] = resume - since
+                return replay
+
+        if since is None:
+            window = self.buffer.last(max_lines, record_filter)
+        else:
+            window = self.buffer.since(since, max_lines, record_filter)
+
+        update = self._build_update(window['lines'], window['startSeq'], window['gap'])
+        if record_filter is not None and not record_filter.empty:
+            # Lines were skipped, so the cursor is the end of the scanned window
+            update['nextSeq'] = min(window['startSeq'] + max_lines, self.buffer.next_seq)
+            update['filter'] = record_filter.to_dict()
+        update['ranges'] = self.buffer.ranges(update['startSeq'], update['nextSeq'])
+        update['hasMore'] = window['hasMore']
+        if window['gap'] and since is not None:
+            update['missedLines'] = window['startSeq'] - since
+        if reset:
+            update['reset'] = True
+        return update
+
+    async def _replay(
+        self,
+        since: int,
+        max_lines: int,
+        record_filter: Optional[RecordFilter] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Lines [since, ...) that the buffer already evicted, re-read from the log file"""
+        location = self.checkpoints.locate(since, self.buffer.first_seq)
+        if not location:
+            return None
+        count = min(max_lines, location['reach'] - since)
+        lines = await self.log_reader.read_range(
+            location['fileId'], location['start'], location['end'], location['skip'], count
+        )
+        if lines is None or len(lines) != count:
+            # The file no longer matches what we delivered
+            logger.warning(f"Replay of {location['fileId']} from seq {since} failed, reporting a gap")
+            return None
+
+        next_seq = since + count
+        if record_filter is not None and not record_filter.empty:
+            batch = RecordBatch(lines)
+            lines = [batch.line(i) for i in record_filter.indices(batch)]
+
+        update = self._build_update(lines, since, gap=False)
+        update['nextSeq'] = next_seq
+        update['ranges'] = [{'fileId': location['fileId'], 'startSeq': since, 'endSeq': next_seq}]
+        update['replayed'] = True
+        update['hasMore'] = True
+        if record_filter is not None and not record_filter.empty:
+            update['filter'] = record_filter.to_dict()
+        return update
+
+    def _build_update(self, lines: List[str], start_seq: int, gap: bool) -> Dict[str, Any]:
+        """Build a response payload in the /api/logs format"""
+        meta = self.last_result
+        return {
+            'success': True,
+            'filename': meta.get('filename'),
+            'size': meta.get('size'),
+            'hasNewData': len(lines) > 0,
+            'newLines': lines,
+            'timestamp': datetime.now().isoformat(),
+            'totalLines': len(lines),
+            'selectedPath': meta.get('selectedPath'),
+            'fileStats': meta.get('fileStats'),
+            'streamId': self.stream_id,
+            'startSeq': start_seq,
+            'nextSeq': start_seq + len(lines),
+            'gap': gap
+        }
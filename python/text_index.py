@@ -0,0 +1,588 @@
+"""
+Trigram Index for ACT Sentinel logs
+Per-file inverted index from trigrams to blocks, used to narrow searches
+"""
+
+import asyncio
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Sequence, Set, Tuple
+
+from log_catalog import log_file_date
+from log_mirror import LogMirror, MirrorSource, MIRROR_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+TEXT_INDEX_ENABLED = True
+# Indexes live on local disk and are built from the mirror, never the share
+TEXT_INDEX_DIR = Path('cache') / 'textindex'
+# Blocks end on the first line break after this many bytes
+TEXT_INDEX_BLOCK_BYTES = 64 * 1024
+# How often today's index catches up with the mirror, and is saved (seconds)
+TEXT_INDEX_INTERVAL = 10.0
+TEXT_INDEX_SAVE_INTERVAL = 60.0
+# Mirror bytes indexed per catch-up step of today's file
+TEXT_INDEX_STEP_BYTES = 8 * 1024 * 1024
+# Above this share of candidate blocks a plain scan of the file is cheaper
+TEXT_INDEX_MAX_CANDIDATES = 0.5
+# Bytes hashed to check an index still matches the mirror it was built from
+FINGERPRINT_BYTES = 4096
+READ_BYTES = 4 * 1024 * 1024
+
+# File layout, arrays in native byte order as in line_index:
+#   header | block offsets q[blocks] | block first lines q[blocks]
+#   | trigrams I[keys] (sorted) | posting ends I[keys] | postings
+# Each posting list is the delta-encoded block ids as LEB128 varints.
+_MAGIC = b'ACTTRI01'
+_HEADER = struct.Struct('<8sIIqqqII')
+
+@lru_cache(maxsize=65536)
+def _token_trigrams(token: bytes) -> Tuple[int, ...]:
+    return tuple(
+        (token[i] << 16) | (token[i + 1] << 8) | token[i + 2]
+        for i in range(len(token) - 2)
+    )
+
+def block_trigrams(data: bytes) -> Set[int]:
+    """Trigrams of every whitespace-separated token in data, case-folded
+
+    Trigrams spanning whitespace are not indexed; query_trigrams skips
+    them as well, so a substring match always shares all its trigrams.
+    Tokens repeat heavily in logs, so each distinct one is expanded once.
+    """
+    grams: Set[int] = set()
+    for token in set(data.lower().split()):
+        if len(token) >= 3:
+            grams.update(_token_trigrams(token))
+    return grams
+
+def query_trigrams(needle: str) -> Set[int]:
+    """Trigrams a line must contain to hold needle; empty if none can be required"""
+    return block_trigrams(needle.encode('utf-8'))
+
+def _encode_postings(block_ids: Sequence[int]) -> bytes:
+    deltas = [block_ids[0]] + [b - a for a, b in zip(block_ids, block_ids[1:])]
+    if max(deltas) < 0x80:
+        return bytes(deltas)
+    out = bytearray()
+    for value in deltas:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+def _decode_postings(data: bytes) -> List[int]:
+    if not data or max(data) < 0x80:
+        return list(accumulate(data))
+    deltas = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            deltas.append(value)
+            value = shift = 0
+    return list(accumulate(deltas))
+
+def fingerprint(path: Path, end: int) -> int:
+    """CRC32 of the bytes just before end, tying an index to its data"""
+    start = max(0, end - FINGERPRINT_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if len(data) != end - start:
+        return -1
+    return zlib.crc32(data)
+
+class _IndexView:
+    """Queries shared by the in-memory builder and the on-disk reader"""
+
+    block_offsets: Sequence[int]
+    block_lines: Sequence[int]
+    indexed_bytes: int
+    line_count: int
+
+    def posting(self, gram: int) -> Sequence[int]:
+        raise NotImplementedError
+
+    @property
+    def block_count(self) -> int:
+        return len(self.block_offsets)
+
+    def candidates(self, needles: Iterable[str]) -> Optional[List[int]]:
+        """Blocks that may hold any of the needles; None if the index cannot tell"""
+        blocks: Set[int] = set()
+        for needle in needles:
+            grams = query_trigrams(needle)
+            if not grams:
+                return None
+            # Intersect starting from the rarest trigram
+            postings = sorted((self.posting(gram) for gram in grams), key=len)
+            matched = set(postings[0])
+            for posting in postings[1:]:
+                if not matched:
+                    break
+                matched.intersection_update(posting)
+            blocks.update(matched)
+        return sorted(blocks)
+
+    def ranges(self, blocks: List[int]) -> List[Tuple[int, int, int]]:
+        """(start, end, first line) for runs of consecutive blocks"""
+        ranges = []
+        run_start = None
+        for i, block in enumerate(blocks):
+            if run_start is None:
+                run_start = block
+            if i + 1 < len(blocks) and blocks[i + 1] == block + 1:
+                continue
+            end = self.block_offsets[block + 1] if block + 1 < self.block_count else self.indexed_bytes
+            ranges.append((self.block_offsets[run_start], end, self.block_lines[run_start] + 1))
+            run_start = None
+        return ranges
+
+    def plan(self, needles: Iterable[str], size: Optional[int]) -> Optional[List[Tuple[int, Optional[int], int]]]:
+        """(start, end, first line) ranges to scan for needles in a file of size bytes
+
+        Bytes past the index are always included; size None means the file
+        may still grow. None when the index would not save enough work.
+        """
+        blocks = self.candidates(needles)
+        if blocks is None or len(blocks) > TEXT_INDEX_MAX_CANDIDATES * self.block_count:
+            return None
+        ranges: List[Tuple[int, Optional[int], int]] = list(self.ranges(blocks))
+        if size is None or self.indexed_bytes < size:
+            ranges.append((self.indexed_bytes, size, self.line_count + 1))
+        return ranges
+
+class TrigramIndexWriter(_IndexView):
+    """Builds an index incrementally from contiguous bytes of one file"""
+
+    def __init__(self, block_bytes: int = TEXT_INDEX_BLOCK_BYTES):
+        self.block_bytes = block_bytes
+        self.block_offsets = array('q')
+        self.block_lines = array('q')
+        self.postings: Dict[int, array] = {}
+        self.indexed_bytes = 0
+        self.line_count = 0
+        self.final = False
+        self.dirty = False
+        # Appends from a worker thread race with searches on the loop
+        self.lock = threading.Lock()
+
+    def posting(self, gram: int) -> Sequence[int]:
+        return self.postings.get(gram, ())
+
+    def plan(self, needles: Iterable[str], size: Optional[int]):
+        with self.lock:
+            return super().plan(needles, size)
+
+    def add(self, offset: int, data: bytes, final: bool = False) -> int:
+        """Index whole blocks of data, which must start at indexed_bytes
+
+        Without final, a trailing run shorter than a block is left for the
+        next call. Returns the number of bytes consumed.
+        """
+        if offset != self.indexed_bytes or self.final:
+            return 0
+        pos = 0
+        size = len(data)
+        while pos < size:
+            cut = data.find(b'\n', pos + self.block_bytes - 1)
+            if cut == -1:
+                if not final:
+                    break
+                cut = size - 1
+            block = data[pos:cut + 1]
+            grams = block_trigrams(block)
+            with self.lock:
+                block_id = len(self.block_offsets)
+                self.block_offsets.append(offset + pos)
+                self.block_lines.append(self.line_count)
+                for gram in grams:
+                    posting = self.postings.get(gram)
+                    if posting is None:
+                        posting = self.postings[gram] = array('I')
+                    posting.append(block_id)
+                self.line_count += block.count(b'\n')
+                self.indexed_bytes = offset + cut + 1
+            pos = cut + 1
+        if final:
+            if data and not data.endswith(b'\n'):
+                # scan_file counts an unterminated last line as a line
+                self.line_count += 1
+            self.final = True
+        self.dirty = True
+        return pos
+
+    def encode(self, data_fingerprint: int) -> bytes:
+        """The index file contents, tied to its data by data_fingerprint"""
+        with self.lock:
+            keys = array('I', sorted(self.postings))
+            ends = array('I')
+            blobs = []
+            position = 0
+            for key in keys:
+                blob = _encode_postings(self.postings[key])
+                blobs.append(blob)
+                position += len(blob)
+                ends.append(position)
+            header = _HEADER.pack(
+                _MAGIC, self.block_bytes, len(self.block_offsets),
+                self.indexed_bytes, self.line_count, data_fingerprint, int(self.final), len(keys)
+            )
+            return b''.join([
+                header, self.block_offsets.tobytes(), self.block_lines.tobytes(),
+                keys.tobytes(), ends.tobytes(), *blobs
+            ])
+
+    @classmethod
+    def decode(cls, data: bytes) -> Tuple['TrigramIndexWriter', int]:
+        """Writer resumed from index file contents, plus the stored fingerprint"""
+        reader = TrigramIndexReader(data)
+        writer = cls(reader.block_bytes)
+        writer.block_offsets = array('q', reader.block_offsets)
+        writer.block_lines = array('q', reader.block_lines)
+        writer.indexed_bytes = reader.indexed_bytes
+        writer.line_count = reader.line_count
+        writer.final = reader.final
+        for i, key in enumerate(reader.keys):
+            writer.postings[key] = array('I', reader.posting_at(i))
+        return writer, reader.fingerprint
+
+class TrigramIndexReader(_IndexView):
+    """Read-only view over an encoded index; posting lists decode on demand"""
+
+    def __init__(self, data):
+        view = memoryview(data)
+        magic, self.block_bytes, blocks, self.indexed_bytes, self.line_count, self.fingerprint, final, key_count = \
+            _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a trigram index")
+        self.final = bool(final)
+        pos = _HEADER.size
+        self.block_offsets = view[pos:pos + blocks * 8].cast('q')
+        pos += blocks * 8
+        self.block_lines = view[pos:pos + blocks * 8].cast('q')
+        pos += blocks * 8
+        self.keys = view[pos:pos + key_count * 4].cast('I')
+        pos += key_count * 4
+        self._ends = view[pos:pos + key_count * 4].cast('I')
+        pos += key_count * 4
+        self._postings = view[pos:]
+        if len(self.block_offsets) != blocks or len(self._postings) < (self._ends[-1] if key_count else 0):
+            raise ValueError("Truncated trigram index")
+
+    def posting_at(self, i: int) -> List[int]:
+        start = self._ends[i - 1] if i else 0
+        return _decode_postings(self._postings[start:self._ends[i]].tobytes())
+
+    def posting(self, gram: int) -> Sequence[int]:
+        i = bisect_left(self.keys, gram)
+        if i < len(self.keys) and self.keys[i] == gram:
+            return self.posting_at(i)
+        return ()
+
+    @staticmethod
+    def read_header(path: Path) -> Tuple[int, int, bool]:
+        """(indexed bytes, fingerprint, final) without loading the index"""
+        with open(path, 'rb') as f:
+            magic, _, _, indexed_bytes, _, data_fingerprint, final, _ = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError("Not a trigram index")
+        return indexed_bytes, data_fingerprint, bool(final)
+
+def _write_index(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+def build_file_index(mirror_path: str, index_path: str, size: int) -> Dict[str, Any]:
+    """Pool worker: index a closed, fully mirrored file
+
+    Resumes the partial index written while the file was today's, if it
+    still matches the mirror, and writes the finished index atomically.
+    """
+    mirror_path, index_path = Path(mirror_path), Path(index_path)
+    writer = None
+    try:
+        writer, stored = TrigramIndexWriter.decode(index_path.read_bytes())
+        if writer.final or writer.indexed_bytes > size or fingerprint(mirror_path, writer.indexed_bytes) != stored:
+            writer = None
+    except FileNotFoundError:
+        pass
+    except (ValueError, struct.error) as e:
+        logger.warning(f"Rebuilding corrupt index {index_path}: {e}")
+        writer = None
+    if writer is None:
+        writer = TrigramIndexWriter()
+    resumed = writer.indexed_bytes
+
+    with open(mirror_path, 'rb') as f:
+        f.seek(resumed)
+        read_to = resumed
+        pending = b''
+        while True:
+            chunk = f.read(min(READ_BYTES, size - read_to))
+            read_to += len(chunk)
+            final = not chunk or read_to >= size
+            data = pending + chunk if pending else chunk
+            consumed = writer.add(writer.indexed_bytes, data, final)
+            pending = data[consumed:]
+            if final:
+                break
+
+    _write_index(index_path, writer.encode(fingerprint(mirror_path, writer.indexed_bytes)))
+    return {
+        'file': mirror_path.name,
+        'resumedAt': resumed,
+        'bytes': writer.indexed_bytes,
+        'blocks': writer.block_count,
+        'trigrams': len(writer.postings)
+    }
+
+class LogTextIndex:
+    """Trigram indexes over the mirrored log files
+
+    Closed files get a finished index built once on a background process;
+    today's file is indexed incrementally from the mirror every
+    TEXT_INDEX_INTERVAL. plan() turns a query into the byte ranges that
+    can hold a match, so a search only scans those.
+    """
+
+    def __init__(self, mirror: LogMirror, index_dir: Path = TEXT_INDEX_DIR):
+        self.mirror = mirror
+        self.directory = Path(index_dir)
+        self.enabled = TEXT_INDEX_ENABLED
+        # Today's file: (name, writer, fingerprint of the indexed bytes)
+        self.current: Optional[Tuple[str, TrigramIndexWriter, int]] = None
+        # Finished indexes: name -> (file size, reader)
+        self._readers: Dict[str, Tuple[int, TrigramIndexReader]] = {}
+        # Names whose finished index matched the mirror size
+        self._finished: Dict[str, int] = {}
+        # plan() runs on worker threads; guards _readers and _finished
+        self._cache_lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._saved_at = 0.0
+        self.builds = 0
+        self.queries = 0
+        self.narrowed = 0
+
+    def index_path(self, name: str) -> Path:
+        return self.directory / f"{name}.tri"
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the build process on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def shutdown(self):
+        """Stop the build process"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def plan(self, needles: Optional[List[str]], sources: List[MirrorSource]) -> Dict[str, List[Tuple[int, Optional[int], int]]]:
+        """Ranges to scan per file name, for the files the index can narrow
+
+        Blocking (it may load an index from disk), so run it off the loop.
+        Files missing from the result are scanned in full.
+        """
+        if not self.enabled or not needles:
+            return {}
+        self.queries += 1
+        plans = {}
+        for source in sources:
+            index = self._view(source)
+            if index is None:
+                continue
+            ranges = index.plan(needles, source.size)
+            if ranges is not None:
+                plans[source.name] = ranges
+        self.narrowed += len(plans)
+        return plans
+
+    def _view(self, source: MirrorSource) -> Optional[_IndexView]:
+        """The index covering source's mirrored prefix, if there is one"""
+        if self.current and self.current[0] == source.name:
+            writer = self.current[1]
+            return writer if writer.indexed_bytes <= source.mirrored else None
+        if not source.local:
+            return None
+
+        with self._cache_lock:
+            cached = self._readers.get(source.name)
+        if cached and cached[0] == source.size:
+            return cached[1]
+        path = self.index_path(source.name)
+        try:
+            with open(path, 'rb') as f:
+                reader = TrigramIndexReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable index {path}: {e}")
+            return None
+        if not reader.final or reader.indexed_bytes != source.size \
+                or fingerprint(Path(source.mirror_path), reader.indexed_bytes) != reader.fingerprint:
+            with self._cache_lock:
+                self._finished.pop(source.name, None)
+            return None
+        with self._cache_lock:
+            self._readers[source.name] = (source.size, reader)
+        return reader
+
+    async def run(self, log_reader):
+        """Keep today's index current and build indexes for closed files, forever"""
+        if not self.enabled:
+            return
+        logger.info("Starting text index")
+        try:
+            while True:
+                try:
+                    await self.update(log_reader)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Text index update failed: {e}")
+                await asyncio.sleep(TEXT_INDEX_INTERVAL)
+        finally:
+            if self.current:
+                self._save_current()
+
+    async def update(self, log_reader):
+        """One catch-up step for today's file, then any pending closed-file builds"""
+        current = log_reader.current_log_file
+        if current is not None:
+            await self._update_current(current.name)
+        await self._build_closed(current.name if current is not None else None)
+
+    async def _update_current(self, name: str):
+        if self.current is None or self.current[0] != name:
+            if self.current:
+                # The previous day's partial index is finished by _build_closed
+                await asyncio.to_thread(self._save_current)
+            self.current = await asyncio.to_thread(self._resume, name)
+
+        mirror = self.mirror.files.get(name)
+        # Nothing is mirrored yet (empty file, or before the first append)
+        if mirror is None or not mirror.verified or not mirror.size:
+            return
+        self.current = await asyncio.to_thread(self._step, self.current, mirror.path, mirror.size)
+
+        now = asyncio.get_running_loop().time()
+        if self.current[1].dirty and now - self._saved_at >= TEXT_INDEX_SAVE_INTERVAL:
+            await asyncio.to_thread(self._save_current)
+            self._saved_at = now
+
+    def _resume(self, name: str) -> Tuple[str, TrigramIndexWriter, int]:
+        """Pick up today's index from disk, or start a new one"""
+        try:
+            writer, stored = TrigramIndexWriter.decode(self.index_path(name).read_bytes())
+            if not writer.final:
+                return name, writer, stored
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Starting a new index for {name}: {e}")
+        return name, TrigramIndexWriter(), 0
+
+    def _step(self, current, mirror_path: Path, mirrored: int):
+        """Index mirrored bytes of today's file past the writer's position"""
+        name, writer, stored = current
+        if not mirror_path.exists():
+            return current
+        if writer.indexed_bytes > mirrored or fingerprint(mirror_path, writer.indexed_bytes) != stored:
+            # The mirror was reset (file truncated or replaced)
+            logger.info(f"Restarting text index for {name}")
+            writer, stored = TrigramIndexWriter(), 0
+        end = min(mirrored, writer.indexed_bytes + TEXT_INDEX_STEP_BYTES)
+        if end - writer.indexed_bytes >= writer.block_bytes:
+            with open(mirror_path, 'rb') as f:
+                f.seek(writer.indexed_bytes)
+                data = f.read(end - writer.indexed_bytes)
+            if writer.add(writer.indexed_bytes, data):
+                stored = fingerprint(mirror_path, writer.indexed_bytes)
+        return name, writer, stored
+
+    def _save_current(self):
+        name, writer, stored = self.current
+        if writer.dirty:
+            try:
+                _write_index(self.index_path(name), writer.encode(stored))
+                writer.dirty = False
+            except OSError as e:
+                logger.warning(f"Could not save index for {name}: {e}")
+
+    async def _build_closed(self, current_name: Optional[str]):
+        """Finish or build indexes for complete mirrors, one build at a time"""
+        await asyncio.to_thread(self._prune)
+        for name, mirror in list(self.mirror.files.items()):
+            if name == current_name or not mirror.complete or not mirror.verified or not mirror.size:
+                continue
+            with self._cache_lock:
+                if self._finished.get(name) == mirror.size:
+                    continue
+            path = self.index_path(name)
+            try:
+                indexed_bytes, _, final = await asyncio.to_thread(TrigramIndexReader.read_header, path)
+            except (OSError, ValueError, struct.error):
+                indexed_bytes, final = -1, False
+            if not (final and indexed_bytes == mirror.size):
+                with self._cache_lock:
+                    self._readers.pop(name, None)
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), build_file_index,
+                    os.path.abspath(mirror.path), os.path.abspath(path), mirror.size
+                )
+                self.builds += 1
+                logger.info(
+                    f"Indexed {name}: {result['blocks']} blocks, {result['trigrams']} trigrams"
+                    f" (resumed at {result['resumedAt']} bytes)"
+                )
+            with self._cache_lock:
+                self._finished[name] = mirror.size
+
+    def _prune(self):
+        """Delete indexes of files that left the mirror's retention window"""
+        if not self.directory.exists():
+            return
+        oldest = date.today() - timedelta(days=MIRROR_RETENTION_DAYS)
+        for path in self.directory.glob('*.tri'):
+            file_date = log_file_date(path.name[:-4])
+            if file_date and file_date < oldest:
+                with self._cache_lock:
+                    self._readers.pop(path.name[:-4], None)
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"Could not delete old index {path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        current = None
+        if self.current:
+            name, writer, _ = self.current
+            current = {'file': name, 'bytes': writer.indexed_bytes, 'blocks': writer.block_count}
+        return {
+            'enabled': self.enabled,
+            'current': current,
+            'files': len(self._finished),
+            'builds': self.builds,
+            'queries': self.queries,
+            'narrowedFiles': self.narrowed
+        }
@@ -0,0 +1,283 @@
+"""
+Transport Encoding for ACT Sentinel log monitor
+JSON serialisation, compact binary line batches and negotiated HTTP compression
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+
+from aiohttp import web
+from aiohttp.web import ContentCoding
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    brotli = None
+    HAS_BROTLI = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+# Brotli quality 4 is close to gzip -6 in speed and clearly smaller
+BROTLI_QUALITY = 4
+
+# zlib level for gzip/deflate bodies, as aiohttp uses
+ZLIB_LEVEL = 6
+
+# Responses with more lines than this are streamed in chunks of STREAM_CHUNK_LINES
+STREAM_MIN_LINES = 5000
+STREAM_CHUNK_LINES = 1000
+
+# Encoded bodies kept per buffer state
+RESPONSE_CACHE_ENTRIES = 64
+
+# permessage-deflate window bits for /ws (True would mean the default, 15)
+WS_COMPRESS = 15
+
+# Binary batch layout, all integers little-endian:
+#   magic "ALB1" | u32 meta length | meta JSON (UTF-8)
+#   | u32 line count | u32 length per line | concatenated UTF-8 lines
+BATCH_MAGIC = b'ALB1'
+BATCH_CONTENT_TYPE = 'application/x-act-batch'
+_U32 = struct.Struct('<I')
+
+class JsonSerializer:
+    """Compact UTF-8 JSON with the standard library"""
+
+    name = 'json'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def dumps_str(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+class OrjsonSerializer(JsonSerializer):
+    """Same output through orjson, several times faster on line lists"""
+
+    name = 'orjson'
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps_str(self, obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+SERIALIZERS = {'json': JsonSerializer, 'orjson': OrjsonSerializer}
+serializer: JsonSerializer = OrjsonSerializer() if HAS_ORJSON else JsonSerializer()
+
+def set_serializer(name: str):
+    """Switch every endpoint to another serializer; raises ValueError if unavailable"""
+    global serializer
+    if name not in SERIALIZERS or (name == 'orjson' and not HAS_ORJSON):
+        raise ValueError(f"JSON serializer '{name}' is not available")
+    serializer = SERIALIZERS[name]()
+
+def serializer_name() -> str:
+    return serializer.name
+
+def dumps(obj: Any) -> bytes:
+    """Serialise to UTF-8 JSON bytes with the active serializer"""
+    return serializer.dumps(obj)
+
+def dumps_str(obj: Any) -> str:
+    """Serialise to a JSON str, for WebSocket text frames"""
+    return serializer.dumps_str(obj)
+
+def json_response(data: Any, status: int = 200) -> web.Response:
+    """Drop-in for web.json_response using the active serializer"""
+    return web.Response(body=dumps(data), status=status, content_type='application/json')
+
+def encode_batch(meta: Dict[str, Any], lines: Iterable[str]) -> bytes:
+    """Encode metadata plus lines into a binary batch"""
+    encoded = [line.encode('utf-8') for line in lines]
+    lengths = array('I', map(len, encoded))
+    return b''.join([_batch_header(meta, lengths), *encoded])
+
+def encode_batch_slices(meta: Dict[str, Any], slices: Iterable[Tuple[Any, int, int]]) -> bytes:
+    """Encode straight from RecordBatch slices without decoding the lines"""
+    return b''.join(iter_batch_slices(meta, slices))
+
+def iter_batch_slices(meta: Dict[str, Any], slices: Iterable[Tuple[Any, int, int]]) -> Iterator[bytes]:
+    """The batch for RecordBatch slices as a header followed by one chunk per slice"""
+    lengths = array('I')
+    blobs = []
+    for batch, first, last in slices:
+        offsets = batch.offsets
+        lengths.extend(offsets[i + 1] - offsets[i] for i in range(first, last))
+        blobs.append(memoryview(batch.data)[offsets[first]:offsets[last]])
+    yield _batch_header(meta, lengths)
+    yield from blobs
+
+def iter_batch(meta: Dict[str, Any], lines: List[str], chunk_lines: int = STREAM_CHUNK_LINES) -> Iterator[bytes]:
+    """The batch for a line list in chunks of chunk_lines lines"""
+    encoded = [line.encode('utf-8') for line in lines]
+    yield _batch_header(meta, array('I', map(len, encoded)))
+    for i in range(0, len(encoded), chunk_lines):
+        yield b''.join(encoded[i:i + chunk_lines])
+
+def _batch_header(meta: Dict[str, Any], lengths: array) -> bytes:
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+    meta_bytes = dumps(meta)
+    return b''.join([
+        BATCH_MAGIC, _U32.pack(len(meta_bytes)), meta_bytes,
+        _U32.pack(len(lengths)), lengths.tobytes()
+    ])
+
+def iter_json(payload: Dict[str, Any], key: str = 'newLines', chunk_lines: int = STREAM_CHUNK_LINES) -> Iterator[bytes]:
+    """payload as JSON in chunks, serialising its key list chunk_lines items at a time"""
+    items = payload[key]
+    head = dumps({k: v for k, v in payload.items() if k != key})
+    yield head[:-1] + (b',' if len(head) > 2 else b'') + dumps(key) + b':['
+    for i in range(0, len(items), chunk_lines):
+        yield (b',' if i else b'') + dumps(items[i:i + chunk_lines])[1:-1]
+    yield b']}'
+
+def decode_batch(data: bytes) -> Tuple[Dict[str, Any], List[str]]:
+    """Inverse of encode_batch; raises ValueError on malformed input"""
+    if data[:4] != BATCH_MAGIC:
+        raise ValueError("Not a log batch")
+    try:
+        (meta_len,) = _U32.unpack_from(data, 4)
+        pos = 8 + meta_len
+        meta = json.loads(data[8:pos])
+        (count,) = _U32.unpack_from(data, pos)
+        pos += 4
+        lengths = array('I')
+        lengths.frombytes(data[pos:pos + 4 * count])
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        pos += 4 * count
+    except (struct.error, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed log batch: {e}")
+
+    lines = []
+    for length in lengths:
+        lines.append(data[pos:pos + length].decode('utf-8'))
+        pos += length
+    return meta, lines
+
+def wants_batch(request: web.Request) -> bool:
+    """Whether the client asked for the binary batch encoding"""
+    return request.query.get('format') == 'batch' or BATCH_CONTENT_TYPE in request.headers.get('Accept', '')
+
+def negotiate_encoding(request: web.Request) -> Optional[str]:
+    """Pick br, gzip or deflate from Accept-Encoding, honouring q=0"""
+    accepted = {}
+    for part in request.headers.get('Accept-Encoding', '').lower().split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for coding in (('br',) if HAS_BROTLI else ()) + ('gzip', 'deflate'):
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+def compress_body(body: bytes, coding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Apply coding to body; returns the bytes and the coding actually used"""
+    if not coding or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    if coding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY), coding
+    wbits = 31 if coding == 'gzip' else 15
+    compressor = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, wbits)
+    return compressor.compress(body) + compressor.flush(), coding
+
+def encoded_response(body: bytes, content_type: str, coding: Optional[str]) -> web.Response:
+    """Response for a body already compressed by compress_body"""
+    response = web.Response(body=body, content_type=content_type)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if coding:
+        response.headers['Content-Encoding'] = coding
+    return response
+
+def compressed_response(request: web.Request, body: bytes, content_type: str) -> web.Response:
+    """Response with the best content coding the client accepts"""
+    body, coding = compress_body(body, negotiate_encoding(request))
+    return encoded_response(body, content_type, coding)
+
+async def stream_response(request: web.Request, chunks: Iterable[bytes], content_type: str) -> web.StreamResponse:
+    """Write chunks to a chunked response, compressing on the fly"""
+    response = web.StreamResponse(headers={'Content-Type': content_type, 'Vary': 'Accept-Encoding'})
+    coding = negotiate_encoding(request)
+    compressor = None
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        response.headers['Content-Encoding'] = 'br'
+    elif coding:
+        response.enable_compression(ContentCoding(coding))
+    await response.prepare(request)
+
+    for chunk in chunks:
+        if compressor:
+            chunk = compressor.process(bytes(chunk))
+        if chunk:
+            await response.write(chunk)
+    if compressor:
+        await response.write(compressor.finish())
+    await response.write_eof()
+    return response
+
+class ResponseCache:
+    """Encoded response bodies for the current buffer state
+
+    Polling clients at the same position ask for the same thing, so the
+    first request serialises and compresses once and the rest reuse the
+    bytes. Everything is dropped as soon as the state version changes.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.version: Any = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Any, Tuple[bytes, str, Optional[str]]]' = OrderedDict()
+
+    def get(self, version: Any, key: Any) -> Optional[Tuple[bytes, str, Optional[str]]]:
+        """(body, content type, coding) cached for key, or None"""
+        if version != self.version:
+            self.version = version
+            self._entries.clear()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, version: Any, key: Any, body: bytes, content_type: str, coding: Optional[str]):
+        """Cache a body; ignored if the state moved on while it was built"""
+        if version != self.version:
+            return
+        self._entries[key] = (body, content_type, coding)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'bytes': sum(len(entry[0]) for entry in self._entries.values()),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,144 @@
+"""
+WebSocket Client Queues for ACT Sentinel log monitor
+Per-connection bounded outbound queue and sender task
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, Union
+
+from aiohttp import web
+
+from transport import dumps_str
+
+logger = logging.getLogger(__name__)
+
+WS_QUEUE_SIZE = 256
+WS_SEND_TIMEOUT = 10.0
+
+# What to do when a client's queue is full
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_GAP = 'gap'
+OVERFLOW_DISCONNECT = 'disconnect'
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_GAP, OVERFLOW_DISCONNECT)
+WS_OVERFLOW_POLICY = OVERFLOW_GAP
+
+class WebSocketClient:
+    """Outbound queue for one WebSocket so a slow client only delays itself"""
+
+    def __init__(
+        self,
+        ws: web.WebSocketResponse,
+        remote: Optional[str] = None,
+        queue_size: int = WS_QUEUE_SIZE,
+        overflow: str = WS_OVERFLOW_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'")
+        self.ws = ws
+        self.remote = remote
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.send_timeout = send_timeout
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        # Server-side filter; None receives every line
+        self.subscription = None
+        # Log updates as binary batch frames instead of JSON text
+        self.binary = False
+        # Messages replaced by the pending gap marker
+        self.pending_gap = 0
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def start(self):
+        """Start the sender task"""
+        self._task = asyncio.create_task(self._run_sender())
+
+    async def close(self):
+        """Stop the sender and close the socket"""
+        self.closed = True
+        self._ready.set()
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if not self.ws.closed:
+            await self.ws.close()
+
+    def enqueue(self, message: Union[str, bytes]) -> bool:
+        """Queue a pre-serialised message; bytes go out as binary frames. False means drop the client"""
+        if self.closed:
+            return False
+
+        if len(self._queue) >= self.queue_size:
+            if self.overflow == OVERFLOW_DISCONNECT:
+                logger.warning(f"WebSocket {self.remote} queue full, disconnecting")
+                self.dropped += len(self._queue) + 1
+                self._queue.clear()
+                return False
+            if self.overflow == OVERFLOW_DROP_OLDEST:
+                self._queue.popleft()
+                self.dropped += 1
+            else:
+                # Collapse everything queued into one gap marker
+                self.pending_gap += len(self._queue) + 1
+                self.dropped += len(self._queue) + 1
+                self._queue.clear()
+                self._ready.set()
+                return True
+
+        self._queue.append(message)
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+        return True
+
+    async def _run_sender(self):
+        """Drain the queue into the socket, one send at a time"""
+        try:
+            while not self.closed:
+                await self._ready.wait()
+                self._ready.clear()
+
+                while not self.closed and (self.pending_gap or self._queue):
+                    if self.pending_gap:
+                        message = dumps_str({'type': 'gap', 'dropped': self.pending_gap})
+                        self.pending_gap = 0
+                    else:
+                        message = self._queue.popleft()
+                    async with asyncio.timeout(self.send_timeout):
+                        if isinstance(message, bytes):
+                            await self.ws.send_bytes(message)
+                        else:
+                            await self.ws.send_str(message)
+                    self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send to WebSocket {self.remote}: {e}")
+            self.closed = True
+            if not self.ws.closed:
+                await self.ws.close()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue metrics for this connection"""
+        return {
+            'remote': self.remote,
+            'queueDepth': self.queue_depth,
+            'maxQueueDepth': self.max_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'overflowPolicy': self.overflow,
+            'subscription': self.subscription.to_dict() if self.subscription else None
+        }